@@ -0,0 +1,249 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import metrics
+
+SLUG_MAP_TIMEOUT = 60 * 60
+SLUG_MAP_RELOAD_AFTER = 10
+TITLES_VERSION = "titles"
+CATALOG_VERSION = "catalog"
+
+
+def title_tag(title_id):
+    return f"title_{title_id}"
+
+
+def reviews_tag(title_id):
+    return f"reviews_{title_id}"
+
+
+def comments_tag(title_id):
+    return f"comments_{title_id}"
+
+
+def slug_map_key(model):
+    return f"slugs_{model._meta.label_lower}"
+
+
+def load_slug_map(model):
+    mapping = dict(model.objects.values_list("slug", "id"))
+    cache.set(slug_map_key(model), (time.time(), mapping), SLUG_MAP_TIMEOUT)
+    return mapping
+
+
+def get_slug_map(model, max_age=None):
+    # max_age перечитывает карту, только если она старше max_age секунд:
+    # так промахи по несуществующим slug не превращаются в чтение всей
+    # таблицы на каждый запрос.
+    cached = cache.get(slug_map_key(model))
+    if cached is None or (
+        max_age is not None and time.time() - cached[0] >= max_age
+    ):
+        return load_slug_map(model)
+    return cached[1]
+
+
+def invalidate_slug_map(model):
+    cache.delete(slug_map_key(model))
+
+
+def version_key(name):
+    return f"version_{name}"
+
+
+def get_version(name):
+    return cache.get_or_set(version_key(name), 1, None)
+
+
+def get_versions(names):
+    keys = [version_key(name) for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, 1, None)
+            versions[key] = 1
+    return [versions[key] for key in keys]
+
+
+def bump_version(name):
+    key = version_key(name)
+    cache.add(key, 1, None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+        return 1
+
+
+def bump_versions(*names):
+    for name in names:
+        bump_version(name)
+
+
+def params_signature(params, names):
+    return hashlib.sha1(
+        repr(
+            sorted(
+                (name, params.getlist(name))
+                for name in names
+                if name in params
+            )
+        ).encode()
+    ).hexdigest()
+
+
+# Ключ ответа включает версии тегов из get_cache_tags: сигналы моделей
+# увеличивают версии, и устаревшие записи просто перестают читаться.
+class AnonymousResponseCacheMixin:
+    def get_cache_tags(self):
+        return None
+
+    def dispatch(self, request, *args, **kwargs):
+        tags = None
+        if (
+            settings.RESPONSE_CACHE_ENABLED
+            and request.method == "GET"
+            and "HTTP_AUTHORIZATION" not in request.META
+            and "text/html" not in request.META.get("HTTP_ACCEPT", "")
+        ):
+            self.action = self.action_map.get("get")
+            tags = self.get_cache_tags()
+        if not tags:
+            return super().dispatch(request, *args, **kwargs)
+
+        key = "response_" + hashlib.sha1(
+            repr(
+                (
+                    request.path,
+                    sorted(request.GET.lists()),
+                    get_versions(tags),
+                )
+            ).encode()
+        ).hexdigest()
+        cached = self.get_cached_response(key)
+        if cached is not None:
+            return cached
+        metrics.inc(metrics.CACHE_REQUESTS, cache="responses", result="miss")
+
+        lock_key = f"{key}_lock"
+        locked = cache.add(lock_key, 1, settings.RESPONSE_CACHE_LOCK_TIMEOUT)
+        deadline = time.monotonic() + settings.RESPONSE_CACHE_LOCK_TIMEOUT
+        while not locked and time.monotonic() < deadline:
+            time.sleep(settings.RESPONSE_CACHE_LOCK_POLL)
+            cached = self.get_cached_response(key)
+            if cached is not None:
+                return cached
+            # Держатель блокировки мог закончить без записи в кеш: ответ
+            # не 200, исключение или данные из LRU. Тогда блокировку
+            # забирает первый из ожидающих, а не ждут все до таймаута.
+            locked = cache.add(
+                lock_key, 1, settings.RESPONSE_CACHE_LOCK_TIMEOUT
+            )
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code == 200 and not getattr(
+                response, "skip_response_cache", False
+            ):
+                response.render()
+                cache.set(
+                    key,
+                    (response.content, response["Content-Type"]),
+                    settings.RESPONSE_CACHE_TIMEOUT,
+                )
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return response
+
+    def get_cached_response(self, key):
+        cached = cache.get(key)
+        if cached is None:
+            return None
+        metrics.inc(metrics.CACHE_REQUESTS, cache="responses", result="hit")
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+        response["X-Cache"] = "HIT"
+        return response
+
+
+# Локальный для воркера LRU готовых данных сериализатора. Версии тегов
+# в общем кеше сверяются не чаще раза в TITLE_DETAIL_STALENESS секунд:
+# столько запись может отставать от изменений в других воркерах. Ответы
+# из LRU помечаются skip_response_cache, чтобы устаревшие данные не
+# попали в общий кеш ответов под уже новой версией.
+class LocalPayloadCache:
+    def __init__(self, max_bytes, timeout, jitter, staleness):
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.jitter = jitter
+        self.staleness = staleness
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, tags):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            return None
+        data, size, versions, expires, checked = entry
+        if now >= expires:
+            self.discard(key)
+            return None
+        if now - checked >= self.staleness:
+            if get_versions(tags) != versions:
+                self.discard(key)
+                return None
+            entry[4] = now
+        return data
+
+    def set(self, key, versions, data):
+        size = len(json.dumps(data, cls=JSONEncoder))
+        if size > self.max_bytes:
+            return
+        now = time.monotonic()
+        expires = now + self.timeout * random.uniform(
+            1 - self.jitter, 1 + self.jitter
+        )
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = [data, size, versions, expires, now]
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted[1]
+
+    def discard(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.size -= entry[1]
+
+
+_title_detail_cache = None
+
+
+def get_title_detail_cache():
+    global _title_detail_cache
+    if _title_detail_cache is None:
+        _title_detail_cache = LocalPayloadCache(
+            settings.TITLE_DETAIL_CACHE_BYTES,
+            settings.TITLE_DETAIL_CACHE_TIMEOUT,
+            settings.TITLE_DETAIL_CACHE_JITTER,
+            settings.TITLE_DETAIL_STALENESS,
+        )
+    return _title_detail_cache
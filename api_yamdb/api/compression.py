@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import io
+import re
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from . import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+re_accepts_gzip = re.compile(r"\bgzip\b")
+re_accepts_br = re.compile(r"\bbr\b")
+
+
+def gzip_compress(content):
+    buffer = io.BytesIO()
+    with gzip.GzipFile(
+        mode="wb",
+        compresslevel=settings.COMPRESSION_GZIP_LEVEL,
+        fileobj=buffer,
+        mtime=0,
+    ) as zfile:
+        zfile.write(content)
+    return buffer.getvalue()
+
+
+def brotli_compress(content):
+    return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_LEVEL)
+
+
+COMPRESSORS = {"gzip": gzip_compress, "br": brotli_compress}
+
+
+class CompressedBodyCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.cache = CompressedBodyCache(settings.COMPRESSION_CACHE_BYTES)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = self.negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if self.is_cacheable(request, response):
+            key = (
+                encoding,
+                hashlib.sha1(response.content).digest(),
+                len(response.content),
+            )
+            compressed = self.cache.get(key)
+            if compressed is None:
+                metrics.inc(
+                    metrics.CACHE_REQUESTS, cache="compression", result="miss"
+                )
+                compressed = COMPRESSORS[encoding](response.content)
+                self.cache.set(key, compressed)
+            else:
+                metrics.inc(
+                    metrics.CACHE_REQUESTS, cache="compression", result="hit"
+                )
+        else:
+            compressed = COMPRESSORS[encoding](response.content)
+
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        if response.has_header("ETag"):
+            response["ETag"] = re.sub(r"^(W/)?", "W/", response["ETag"], 1)
+        return response
+
+    def negotiate(self, accept_encoding):
+        if brotli is not None and re_accepts_br.search(accept_encoding):
+            return "br"
+        if re_accepts_gzip.search(accept_encoding):
+            return "gzip"
+        return None
+
+    def is_cacheable(self, request, response):
+        cache_control = response.get("Cache-Control", "")
+        return (
+            request.method in ("GET", "HEAD")
+            and response.status_code == 200
+            and "HTTP_AUTHORIZATION" not in request.META
+            and "private" not in cache_control
+            and "no-store" not in cache_control
+        )
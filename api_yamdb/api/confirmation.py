@@ -0,0 +1,78 @@
+import hashlib
+import hmac
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import get_random_string
+
+from reviews.models import User
+
+CODE_DIGITS = 6
+
+
+def issued_at(now=None):
+    ttl = settings.CONFIRMATION_CODE_TTL
+    return int((time.time() if now is None else now) // ttl * ttl)
+
+
+def make_code(user, issued):
+    # В HMAC входит одноразовая метка из User.confirmation_code: после
+    # обмена кода на токен она меняется, и все выданные коды гаснут.
+    message = (
+        f"{user.pk}:{user.email.lower()}:{user.confirmation_code}:{issued}"
+    )
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(), message.encode(), hashlib.sha256
+    ).digest()
+    number = int.from_bytes(digest[:8], "big") % 10 ** CODE_DIGITS
+    return str(number).zfill(CODE_DIGITS)
+
+
+def issue_code(user):
+    # Повторная регистрация в том же окне возвращает тот же живой код,
+    # ничего не записывая в БД.
+    return make_code(user, issued_at())
+
+
+def attempts_key(user):
+    return f"confirmation_attempts_{user.pk}"
+
+
+def rotate_nonce(user):
+    # Сравнение с обменом: метку меняет только тот, кто видел текущую.
+    users = User.objects.filter(pk=user.pk)
+    if user.confirmation_code is None:
+        users = users.filter(confirmation_code__isnull=True)
+    else:
+        users = users.filter(confirmation_code=user.confirmation_code)
+    return bool(users.update(confirmation_code=get_random_string(16)))
+
+
+def register_failure(user):
+    # После CONFIRMATION_CODE_MAX_ATTEMPTS промахов метка меняется и все
+    # выданные коды гаснут: перебор не переживает больше N попыток.
+    key = attempts_key(user)
+    cache.add(key, 0, settings.CONFIRMATION_CODE_TTL * 2)
+    try:
+        attempts = cache.incr(key)
+    except ValueError:
+        return
+    if attempts >= settings.CONFIRMATION_CODE_MAX_ATTEMPTS:
+        rotate_nonce(user)
+        cache.delete(key)
+
+
+def consume_code(user, code):
+    current = issued_at()
+    windows = (current, current - settings.CONFIRMATION_CODE_TTL)
+    if not any(
+        hmac.compare_digest(make_code(user, issued), code)
+        for issued in windows
+    ):
+        register_failure(user)
+        return False
+    if not rotate_nonce(user):
+        return False
+    cache.delete(attempts_key(user))
+    return True
@@ -1,21 +1,108 @@
 import django_filters
+from django.db.models import CharField, Count, Exists, F, OuterRef, Value
+from django.db.models.functions import Cast
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import SearchFilter
 
 from reviews.models import Category, Genre, Title
+from .caching import SLUG_MAP_RELOAD_AFTER, get_slug_map
+
+GENRE_MODES = (("any", "any"), ("all", "all"))
+
+
+def resolve_slugs(model, field_name, slugs):
+    mapping = get_slug_map(model)
+    unknown = [slug for slug in slugs if slug not in mapping]
+    if unknown:
+        # Локальный кеш другого воркера не знает о новых slug, пока не
+        # истечёт таймаут: перед отказом перечитываем карту, но не чаще
+        # раза в SLUG_MAP_RELOAD_AFTER секунд.
+        mapping = get_slug_map(model, max_age=SLUG_MAP_RELOAD_AFTER)
+        unknown = [slug for slug in slugs if slug not in mapping]
+    if unknown:
+        raise ValidationError(
+            {field_name: [f"Неизвестный slug: {', '.join(unknown)}"]}
+        )
+    return [mapping[slug] for slug in slugs]
 
 
 class ModelFilter(django_filters.FilterSet):
-    genre = django_filters.ModelChoiceFilter(
-        field_name="genre__slug",
-        to_field_name="slug",
-        queryset=Genre.objects.all(),
-    )
-    category = django_filters.ModelChoiceFilter(
-        field_name="category__slug",
-        to_field_name="slug",
-        queryset=Category.objects.all(),
+    genre = django_filters.CharFilter(method="filter_genre")
+    genre_mode = django_filters.ChoiceFilter(
+        choices=GENRE_MODES, method="filter_genre_mode"
     )
+    category = django_filters.CharFilter(method="filter_category")
     name = django_filters.CharFilter(lookup_expr="icontains")
+    min_rating = django_filters.NumberFilter(
+        field_name="rating", lookup_expr="gte"
+    )
 
     class Meta:
         model = Title
-        fields = ("genre", "category", "name", "year")
+        fields = {"year": ["exact", "gte", "lte"]}
+
+    def filter_genre(self, queryset, name, value):
+        slugs = [slug for slug in value.split(",") if slug]
+        if not slugs:
+            return queryset
+        genre_ids = resolve_slugs(Genre, name, slugs)
+        genre_links = Title.genre.through.objects.filter(
+            title_id=OuterRef("pk")
+        )
+        if self.form.cleaned_data.get("genre_mode") == "all":
+            for index, genre_id in enumerate(genre_ids):
+                alias = f"has_genre_{index}"
+                queryset = queryset.annotate(
+                    **{alias: Exists(genre_links.filter(genre_id=genre_id))}
+                ).filter(**{alias: True})
+            return queryset
+        return queryset.annotate(
+            has_genre=Exists(genre_links.filter(genre_id__in=genre_ids))
+        ).filter(has_genre=True)
+
+    def filter_genre_mode(self, queryset, name, value):
+        return queryset
+
+    def filter_category(self, queryset, name, value):
+        (category_id,) = resolve_slugs(Category, name, [value])
+        return queryset.filter(category_id=category_id)
+
+
+class LowerExactSearchFilter(SearchFilter):
+    lookup_prefixes = dict(SearchFilter.lookup_prefixes, **{"=": "lower"})
+
+    def get_search_terms(self, request):
+        return [term.lower() for term in super().get_search_terms(request)]
+
+
+def count_facets(title_ids):
+    def grouped(queryset, facet, value, counted):
+        return (
+            queryset.order_by()
+            .annotate(facet=Value(facet, CharField()), value=value)
+            .values("facet", "value")
+            .annotate(count=Count(counted))
+        )
+
+    titles = Title.objects.filter(pk__in=title_ids)
+    rows = grouped(
+        Title.genre.through.objects.filter(title_id__in=title_ids),
+        "genre",
+        F("genre__slug"),
+        "title_id",
+    ).union(
+        grouped(titles, "category", F("category__slug"), "id"),
+        grouped(
+            titles, "decade", Cast(F("year") / 10 * 10, CharField()), "id"
+        ),
+        all=True,
+    )
+    facets = {"genre": [], "category": [], "decade": []}
+    for row in rows:
+        if row["value"] is not None:
+            facets[row["facet"]].append(
+                {"value": row["value"], "count": row["count"]}
+            )
+    for values in facets.values():
+        values.sort(key=lambda item: item["value"])
+    return facets
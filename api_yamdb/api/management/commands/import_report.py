@@ -0,0 +1,47 @@
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+def parse_importtime(output):
+    # Формат строк `-X importtime`:
+    # "import time: self [us] | cumulative | imported package".
+    totals = Counter()
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_time, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_time)
+    return totals
+
+
+class Command(BaseCommand):
+    help = "Показывает время импорта WSGI-приложения по пакетам"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20)
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                "import api_yamdb.wsgi",
+            ],
+            cwd=settings.BASE_DIR,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        totals = parse_importtime(result.stderr)
+        total = sum(totals.values())
+        for package, micros in totals.most_common(options["limit"]):
+            self.stdout.write(
+                f"{package:<32} {micros / 1000:>9.1f} ms"
+                f" {micros / total:>6.1%}"
+            )
+        self.stdout.write(f"{'total':<32} {total / 1000:>9.1f} ms")
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.moderation import claimable_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Выполняет ожидающие и брошенные задачи модерации"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Повторять каждые N секунд вместо однократного запуска",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            job_ids = claimable_jobs().order_by("created").values_list(
+                "id", flat=True
+            )
+            for job_id in list(job_ids):
+                try:
+                    if run_job(job_id):
+                        self.stdout.write(f"Задача #{job_id} выполнена")
+                except Exception as error:
+                    self.stderr.write(f"Задача #{job_id} упала: {error}")
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
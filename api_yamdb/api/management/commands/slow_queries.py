@@ -0,0 +1,157 @@
+import json
+import re
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.slowqueries import fingerprint
+
+TABLES = re.compile(r'(?:FROM|JOIN) "(\w+)"(?: (?:AS )?"?(\w+)"?)?')
+CONDITIONS = re.compile(
+    r'(?:"(\w+)"|\b(\w+))\."(\w+)"\s*(=|<=|>=|<|>|IN\b|IS\b|LIKE\b)'
+    r"\s*(\(?\s*%s|\S+)",
+    re.IGNORECASE,
+)
+SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(.*)$")
+EQUALITY = {"=", "IN", "IS"}
+
+
+def alias_map(sql):
+    aliases = {}
+    for table, alias in TABLES.findall(sql):
+        aliases[table] = table
+        if alias and alias.upper() not in ("ON", "WHERE", "INNER", "LEFT"):
+            aliases[alias] = table
+    return aliases
+
+
+def postgres_scans(node):
+    if node.get("Node Type") == "Seq Scan":
+        yield node["Relation Name"]
+    for child in node.get("Plans", ()):
+        yield from postgres_scans(child)
+
+
+def scanned_tables(record, aliases):
+    plan = record.get("plan") or []
+    if record["vendor"] == "postgresql":
+        return {
+            table for entry in plan for table in postgres_scans(entry["Plan"])
+        }
+    tables = set()
+    for detail in plan:
+        match = SQLITE_SCAN.match(detail)
+        if match and "USING" not in match.group(2):
+            tables.add(aliases.get(match.group(1), match.group(1)))
+    return tables
+
+
+def filtered_columns(sql, aliases, table):
+    # Условия JOIN ... ON сравнивают два столбца и не отбирают строки
+    # сканируемой таблицы; коррелированные подзапросы стоят в WHERE.
+    equality, ranges = [], []
+    for match in CONDITIONS.finditer(sql):
+        quoted, bare, column, operator, value = match.groups()
+        if aliases.get(quoted or bare) != table or column == "id":
+            continue
+        if "%s" not in value and sql[: match.start()].endswith("ON ("):
+            continue
+        target = equality if operator.upper() in EQUALITY else ranges
+        if column not in equality + ranges:
+            target.append(column)
+    return tuple(equality + ranges)[:3]
+
+
+def reviews_tables():
+    config = apps.get_app_config("reviews")
+    return {
+        model._meta.db_table: model
+        for model in config.get_models(include_auto_created=True)
+    }
+
+
+def existing_indexes(table):
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [
+        tuple(constraint["columns"])
+        for constraint in constraints.values()
+        if constraint["index"] or constraint["unique"]
+        or constraint["primary_key"]
+    ]
+
+
+def describe_index(model, columns):
+    by_column = {field.column: field.name for field in model._meta.fields}
+    fields = ", ".join(
+        f'"{by_column.get(column, column)}"' for column in columns
+    )
+    return f"{model._meta.label}: models.Index(fields=[{fields}])"
+
+
+class Command(BaseCommand):
+    help = "Отчёт по медленным запросам и кандидаты в индексы для reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--log", default=settings.SLOW_QUERY_LOG)
+        parser.add_argument("--limit", type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["log"], encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            raise CommandError(f"Журнал {options['log']} не найден")
+
+        tables = reviews_tables()
+        groups = defaultdict(lambda: {"count": 0, "total": 0.0, "max": 0.0})
+        candidates = defaultdict(
+            lambda: {"count": 0, "total": 0.0, "views": set()}
+        )
+        for record in records:
+            view = f"{record['view']}.{record['action']}".rstrip(".")
+            group = groups[(view, fingerprint(record["sql"]))]
+            group["count"] += 1
+            group["total"] += record["duration_ms"]
+            group["max"] = max(group["max"], record["duration_ms"])
+
+            aliases = alias_map(record["sql"])
+            for table in scanned_tables(record, aliases) & set(tables):
+                columns = filtered_columns(record["sql"], aliases, table)
+                if not columns:
+                    continue
+                candidate = candidates[(table, columns)]
+                candidate["count"] += 1
+                candidate["total"] += record["duration_ms"]
+                candidate["views"].add(view)
+
+        self.stdout.write("Самые медленные запросы:")
+        top = sorted(groups.items(), key=lambda item: -item[1]["total"])
+        for (view, sql), group in top[: options["limit"]]:
+            self.stdout.write(
+                f"{group['total']:>10.1f} ms {group['count']:>6}x "
+                f"max {group['max']:.1f} ms  {view}\n    {sql[:300]}"
+            )
+
+        self.stdout.write("\nКандидаты в индексы:")
+        suggested = 0
+        for (table, columns), candidate in sorted(
+            candidates.items(), key=lambda item: -item[1]["total"]
+        ):
+            if any(
+                index[: len(columns)] == columns
+                for index in existing_indexes(table)
+            ):
+                continue
+            suggested += 1
+            self.stdout.write(
+                f"{describe_index(tables[table], columns)}  "
+                f"# {candidate['count']} запросов, "
+                f"{candidate['total']:.1f} ms, "
+                f"{', '.join(sorted(candidate['views']))}"
+            )
+        if not suggested:
+            self.stdout.write("нет")
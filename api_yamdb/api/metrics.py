@@ -0,0 +1,256 @@
+import bisect
+import glob
+import json
+import os
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+
+REQUESTS = "yamdb_http_requests_total"
+LATENCY = "yamdb_http_request_duration_seconds"
+QUERIES = "yamdb_db_queries_per_request"
+PAGINATION_DEPTH = "yamdb_pagination_depth"
+AUTH_FAILURES = "yamdb_auth_failures_total"
+CACHE_REQUESTS = "yamdb_cache_requests_total"
+
+HISTOGRAMS = {
+    LATENCY: (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    QUERIES: (1, 2, 5, 10, 20, 50, 100, 200, 500),
+    PAGINATION_DEPTH: (0, 10, 100, 1000, 10000, 100000),
+}
+AUTH_FAILURE_REASONS = {401: "unauthorized", 403: "forbidden"}
+
+# Каждый воркер агрегирует метрики в своих словарях без блокировок,
+# а /metrics склеивает снимки всех воркеров из METRICS_DIR.
+_counters = {}
+_histograms = {}
+ARCHIVE_NAME = "archive.json"
+_last_flush = 0.0
+
+
+def labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    key = (name, labels_key(labels))
+    _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    key = (name, labels_key(labels))
+    histogram = _histograms.get(key)
+    if histogram is None:
+        histogram = _histograms[key] = [
+            [0] * (len(HISTOGRAMS[name]) + 1), 0.0, 0
+        ]
+    histogram[0][bisect.bisect_left(HISTOGRAMS[name], value)] += 1
+    histogram[1] += value
+    histogram[2] += 1
+
+
+def snapshot(counters=None, histograms=None):
+    counters = _counters if counters is None else counters
+    histograms = _histograms if histograms is None else histograms
+    return {
+        "counters": [
+            [name, dict(labels), value]
+            for (name, labels), value in counters.items()
+        ],
+        "histograms": [
+            [name, dict(labels)] + histogram
+            for (name, labels), histogram in histograms.items()
+        ],
+    }
+
+
+def write_snapshot(path, data):
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def worker_path(pid):
+    return os.path.join(settings.METRICS_DIR, f"metrics_{pid}.json")
+
+
+def flush(force=False):
+    global _last_flush
+    if not settings.METRICS_DIR:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+        return
+    _last_flush = now
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    write_snapshot(worker_path(os.getpid()), snapshot())
+
+
+# Жизненный цикл каталога как в multiprocess-режиме Prometheus: мастер
+# очищает его при старте, а файл завершившегося воркера вливает в общий
+# архив. Иначе счётчики мёртвых воркеров копились бы вечно, а новый
+# воркер с тем же PID затирал бы старый файл и «сбрасывал» счётчики.
+def reset():
+    if not settings.METRICS_DIR:
+        return
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, "*")):
+        os.remove(path)
+
+
+def retire(pid):
+    if not settings.METRICS_DIR:
+        return
+    path = worker_path(pid)
+    if not os.path.exists(path):
+        return
+    archive = os.path.join(settings.METRICS_DIR, ARCHIVE_NAME)
+    snapshots = []
+    for source in (path, archive):
+        if os.path.exists(source):
+            with open(source) as f:
+                snapshots.append(json.load(f))
+    write_snapshot(archive, snapshot(*merge(snapshots)))
+    os.remove(path)
+
+
+def collect():
+    if not settings.METRICS_DIR:
+        return [snapshot()]
+    flush(force=True)
+    snapshots = []
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, "*.json")):
+        with open(path) as f:
+            snapshots.append(json.load(f))
+    return snapshots
+
+
+def merge(snapshots):
+    counters = {}
+    histograms = {}
+    for data in snapshots:
+        for name, labels, value in data["counters"]:
+            key = (name, labels_key(labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, total, count in data["histograms"]:
+            key = (name, labels_key(labels))
+            merged = histograms.setdefault(
+                key, [[0] * len(buckets), 0.0, 0]
+            )
+            merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+            merged[1] += total
+            merged[2] += count
+    return counters, histograms
+
+
+def format_labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{%s}" % ",".join(
+        '%s="%s"' % (key, str(value).replace('"', '\\"'))
+        for key, value in pairs
+    )
+
+
+def render(counters, histograms):
+    lines = []
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {name} counter")
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{name}{format_labels(labels)} {value}")
+    for name in sorted({name for name, _ in histograms}):
+        lines.append(f"# TYPE {name} histogram")
+        bounds = [str(bound) for bound in HISTOGRAMS[name]] + ["+Inf"]
+        for (metric, labels), histogram in sorted(histograms.items()):
+            if metric != name:
+                continue
+            buckets, total, count = histogram
+            cumulative = 0
+            for bound, bucket in zip(bounds, buckets):
+                cumulative += bucket
+                lines.append(
+                    f"{name}_bucket{format_labels(labels, le=bound)} "
+                    f"{cumulative}"
+                )
+            lines.append(f"{name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    return HttpResponse(
+        render(*merge(collect())),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+def resolve_view(view_func, method):
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        return view_func.__name__, ""
+    actions = getattr(view_func, "actions", None) or {}
+    return view_class.__name__, actions.get(method.lower(), "")
+
+
+def pagination_depth(request):
+    try:
+        if "offset" in request.GET:
+            return int(request.GET["offset"])
+        if "page" in request.GET:
+            page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+            return (int(request.GET["page"]) - 1) * page_size
+    except ValueError:
+        pass
+    return None
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.metrics_view = None
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        if request.metrics_view is not None:
+            view, action = request.metrics_view
+            inc(
+                REQUESTS,
+                view=view,
+                action=action,
+                method=request.method,
+                status=response.status_code,
+            )
+            observe(LATENCY, duration, view=view, action=action)
+            observe(QUERIES, counter.count, view=view, action=action)
+            depth = pagination_depth(request)
+            if depth is not None:
+                observe(PAGINATION_DEPTH, depth, view=view, action=action)
+            if response.status_code in AUTH_FAILURE_REASONS:
+                inc(
+                    AUTH_FAILURES,
+                    view=view,
+                    reason=AUTH_FAILURE_REASONS[response.status_code],
+                )
+        flush()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = resolve_view(view_func, request.method)
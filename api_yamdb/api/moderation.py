@@ -0,0 +1,153 @@
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from reviews import scores
+from reviews.models import (
+    Comment,
+    CommentBody,
+    ModerationJob,
+    Review,
+    ReviewBody,
+)
+from . import caching
+
+MODELS = {ModerationJob.REVIEW: Review, ModerationJob.COMMENT: Comment}
+
+
+def job_queryset(job):
+    filters = json.loads(job.filters)
+    queryset = MODELS[job.target].objects.all()
+    if job.action == ModerationJob.HIDE:
+        queryset = queryset.filter(is_hidden=False)
+    if "author" in filters:
+        queryset = queryset.filter(author_id=filters["author"])
+    if "since" in filters:
+        since = parse_datetime(filters["since"])
+        queryset = queryset.filter(pub_date__gte=since)
+    if "until" in filters:
+        until = parse_datetime(filters["until"])
+        queryset = queryset.filter(pub_date__lt=until)
+    if "ids" in filters:
+        queryset = queryset.filter(id__in=filters["ids"])
+    return queryset
+
+
+def lock_batch(job, ids):
+    # Задачу, признанную брошенной, может параллельно дорабатывать старый
+    # воркер. Блокировка строк и повторная проверка условий job_queryset
+    # оставляют в пачке только то, что эта транзакция действительно
+    # скроет или удалит, и журнал оценок не спишет их дважды.
+    return list(
+        job_queryset(job)
+        .filter(id__in=ids)
+        .select_for_update()
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+
+def apply_batch(job, ids):
+    model = MODELS[job.target]
+    batch = model.objects.filter(id__in=ids)
+    if job.target == ModerationJob.REVIEW:
+        scores.record_removed(batch)
+    if job.action == ModerationJob.HIDE:
+        batch.update(is_hidden=True)
+        return
+    # _raw_delete не шлёт сигналы и не каскадирует: журнал оценок пишется
+    # выше, кеш сбрасывается один раз на задачу в invalidate_titles, а
+    # тела текстов удаляются явно до своих строк.
+    if job.target == ModerationJob.REVIEW:
+        bodies = CommentBody.objects.filter(comment__review_id__in=ids)
+        bodies._raw_delete(bodies.db)
+        comments = Comment.objects.filter(review_id__in=ids)
+        comments._raw_delete(comments.db)
+        bodies = ReviewBody.objects.filter(review_id__in=ids)
+    else:
+        bodies = CommentBody.objects.filter(comment_id__in=ids)
+    bodies._raw_delete(bodies.db)
+    batch._raw_delete(batch.db)
+
+
+def invalidate_titles(job, title_ids):
+    tags = [caching.comments_tag(title_id) for title_id in title_ids]
+    if job.target == ModerationJob.REVIEW:
+        tags.append(caching.TITLES_VERSION)
+        for title_id in title_ids:
+            tags.append(caching.title_tag(title_id))
+            tags.append(caching.reviews_tag(title_id))
+    caching.bump_versions(*tags)
+
+
+def claimable_jobs():
+    stale = timezone.now() - timedelta(
+        seconds=settings.MODERATION_STALE_AFTER
+    )
+    return ModerationJob.objects.filter(
+        Q(status=ModerationJob.PENDING)
+        | Q(status=ModerationJob.RUNNING, heartbeat__lt=stale)
+        | Q(status=ModerationJob.RUNNING, heartbeat__isnull=True)
+    )
+
+
+def claim_job(job_id):
+    return bool(
+        claimable_jobs()
+        .filter(id=job_id)
+        .update(status=ModerationJob.RUNNING, heartbeat=timezone.now())
+    )
+
+
+def run_job(job_id):
+    if not claim_job(job_id):
+        return False
+    job = ModerationJob.objects.get(id=job_id)
+    queryset = job_queryset(job).order_by("id")
+    # Возобновлённая задача не видит уже обработанных строк: удалённых
+    # нет, а скрытые отсекает job_queryset.
+    job.total = job.processed + queryset.count()
+    job.save(update_fields=("total",))
+    title_ids = set()
+    last_id = 0
+    try:
+        while True:
+            rows = queryset.filter(id__gt=last_id).values_list(
+                "id", "title_id"
+            )
+            rows = list(rows[: settings.MODERATION_BATCH_SIZE])
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            ids = [row[0] for row in rows]
+            title_ids.update(row[1] for row in rows)
+            with transaction.atomic():
+                ids = lock_batch(job, ids)
+                apply_batch(job, ids)
+                ModerationJob.objects.filter(id=job.id).update(
+                    processed=F("processed") + len(ids),
+                    heartbeat=timezone.now(),
+                )
+    except Exception:
+        ModerationJob.objects.filter(id=job.id).update(
+            status=ModerationJob.FAILED, finished=timezone.now()
+        )
+        raise
+    finally:
+        if title_ids:
+            invalidate_titles(job, title_ids)
+    ModerationJob.objects.filter(id=job.id).update(
+        status=ModerationJob.DONE, finished=timezone.now()
+    )
+    return True
+
+
+def start_job(job):
+    # В асинхронном режиме задачу забирает команда run_moderation_jobs.
+    if not settings.MODERATION_ASYNC:
+        run_job(job.id)
@@ -1,5 +1,18 @@
-from rest_framework.pagination import PageNumberPagination
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection
+from rest_framework.pagination import (
+    CursorPagination,
+    LimitOffsetPagination,
+    PageNumberPagination,
+)
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from . import caching
 
 
 class CommentPagination(PageNumberPagination):
@@ -14,3 +27,105 @@ class CommentPagination(PageNumberPagination):
                 "results": data,
             }
         )
+
+
+class AuthorFeedPagination(CursorPagination):
+    ordering = ("-pub_date", "-id")
+
+
+_count_executor = None
+
+
+def get_count_executor():
+    global _count_executor
+    if _count_executor is None:
+        _count_executor = ThreadPoolExecutor(
+            max_workers=settings.TITLE_COUNT_WORKERS,
+            thread_name_prefix="title-count",
+        )
+    return _count_executor
+
+
+def count_in_thread(queryset):
+    close_old_connections()
+    return queryset.count()
+
+
+def can_count_concurrently():
+    # Отдельный поток — отдельное соединение: это выгодно только при
+    # постоянных соединениях и допустимо вне транзакции и не на SQLite.
+    return (
+        settings.TITLE_COUNT_WORKERS > 0
+        and connection.vendor != "sqlite"
+        and not connection.in_atomic_block
+        and connection.settings_dict["CONN_MAX_AGE"] != 0
+    )
+
+
+class TitlePagination(LimitOffsetPagination):
+    ignored_params = ("limit", "offset", "count")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.request = request
+        self.with_count = request.query_params.get("count") != "false"
+        if not self.with_count:
+            rows = list(queryset[self.offset:self.offset + self.limit + 1])
+            self.count = None
+            self.has_next = len(rows) > self.limit
+            return rows[: self.limit]
+
+        count_queryset = queryset
+        if view is not None and hasattr(view, "get_count_queryset"):
+            count_queryset = view.get_count_queryset()
+        key = "title_count_{}_{}".format(
+            caching.get_version(caching.TITLES_VERSION),
+            caching.params_signature(
+                request.query_params,
+                sorted(set(request.query_params) - set(self.ignored_params)),
+            ),
+        )
+        self.count = cache.get(key)
+        future = None
+        if self.count is None and can_count_concurrently():
+            future = get_count_executor().submit(
+                count_in_thread, count_queryset
+            )
+        rows = list(queryset[self.offset:self.offset + self.limit])
+        if self.count is None:
+            self.count = (
+                future.result() if future else count_queryset.count()
+            )
+            cache.set(key, self.count, settings.TITLE_COUNT_CACHE_TIMEOUT)
+        self.has_next = self.offset + self.limit < self.count
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = replace_query_param(
+            self.request.build_absolute_uri(),
+            self.limit_query_param,
+            self.limit,
+        )
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_paginated_response(self, data):
+        if self.with_count:
+            return super().get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
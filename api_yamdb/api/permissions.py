@@ -32,3 +32,10 @@ class IsAdminOnly(permissions.BasePermission):
         return request.user.is_authenticated and (
             request.user.is_admin or request.user.is_superuser
         )
+
+
+class IsModeratorOrAdmin(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (
+            request.user.is_moderator or request.user.is_admin
+        )
@@ -0,0 +1,193 @@
+import cProfile
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.models.query import QuerySet
+from django.db.models.sql.compiler import SQLCompiler
+from django.template.response import SimpleTemplateResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.generics import GenericAPIView
+from rest_framework.serializers import BaseSerializer
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+
+
+def code_key(func):
+    code = func.__code__
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+PHASES = {
+    "authentication": [APIView.perform_authentication],
+    "permissions": [
+        APIView.check_permissions,
+        APIView.check_object_permissions,
+    ],
+    "throttling": [APIView.check_throttles],
+    "filtering": [GenericAPIView.filter_queryset],
+    "queryset": [QuerySet._fetch_all],
+    "database": [SQLCompiler.execute_sql],
+    "serialization": [BaseSerializer.data.fget],
+    "rendering": [SimpleTemplateResponse.render],
+}
+PHASE_KEYS = {
+    code_key(func): phase
+    for phase, funcs in PHASES.items()
+    for func in funcs
+}
+
+
+class CProfileRecorder:
+    extension = "prof"
+
+    def __enter__(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.disable()
+        self.profile.create_stats()
+
+    def phases(self):
+        timings = Counter()
+        for key, (_, _, _, cumulative, _) in self.profile.stats.items():
+            phase = PHASE_KEYS.get(key)
+            if phase is not None:
+                timings[phase] += cumulative * 1000
+        return timings
+
+    def dump(self, path):
+        self.profile.dump_stats(path)
+
+
+class SamplingRecorder:
+    extension = "collapsed"
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        self.done = threading.Event()
+        self.sampler = threading.Thread(target=self.sample, daemon=True)
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.done.set()
+        self.sampler.join()
+
+    def sample(self):
+        while not self.done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    (code.co_filename, code.co_firstlineno, code.co_name)
+                )
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+
+    def phases(self):
+        timings = Counter()
+        for stack, samples in self.stacks.items():
+            for phase in {PHASE_KEYS.get(key) for key in stack} - {None}:
+                timings[phase] += samples * self.interval * 1000
+        return timings
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            for stack, samples in self.stacks.items():
+                frames = ";".join(
+                    f"{os.path.basename(filename)}:{name}:{line}"
+                    for filename, line, name in stack
+                )
+                f.write(f"{frames} {samples}\n")
+
+
+def prune_profiles(directory, max_files, max_bytes):
+    entries = []
+    for entry in os.scandir(directory):
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+    entries.sort(reverse=True)
+    kept_bytes = 0
+    for index, (_, size, path) in enumerate(entries):
+        kept_bytes += size
+        if index < max_files and kept_bytes <= max_bytes:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class ProfilerMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        if settings.PROFILER_MODE == "sampling":
+            recorder = SamplingRecorder(settings.PROFILER_INTERVAL)
+        else:
+            recorder = CProfileRecorder()
+        start = time.perf_counter()
+        with recorder:
+            response = self.get_response(request)
+        total = (time.perf_counter() - start) * 1000
+
+        profile_id = uuid.uuid4().hex
+        recorder.dump(
+            os.path.join(
+                settings.PROFILER_DIR, f"{profile_id}.{recorder.extension}"
+            )
+        )
+        prune_profiles(
+            settings.PROFILER_DIR,
+            settings.PROFILER_MAX_FILES,
+            settings.PROFILER_MAX_BYTES,
+        )
+        timings = recorder.phases()
+        timings["total"] = total
+        response["X-Profile-Id"] = f"{profile_id}.{recorder.extension}"
+        response["Server-Timing"] = ", ".join(
+            f"{phase};dur={duration:.2f}"
+            for phase, duration in timings.items()
+        )
+        return response
+
+    def should_profile(self, request):
+        if PROFILE_HEADER in request.META:
+            return self.is_admin(request)
+        return (
+            settings.PROFILER_SAMPLE_RATE > 0
+            and random.random() < settings.PROFILER_SAMPLE_RATE
+        )
+
+    def is_admin(self, request):
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return authenticated is not None and authenticated[0].is_admin
@@ -1,12 +1,32 @@
+import json
 import re
 
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from rest_framework.validators import UniqueValidator
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    ModerationJob,
+    Review,
+    Title,
+    User,
+)
 from .validators import validate_year
 
 
+class PreviewModeMixin:
+    # В режиме превью тело из отдельной таблицы не читается: вместо text
+    # отдаётся короткое поле preview.
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get("preview"):
+            del fields["text"]
+            fields["preview"] = serializers.CharField(read_only=True)
+        return fields
+
+
 class GenreSerializer(serializers.ModelSerializer):
     class Meta:
         model = Genre
@@ -36,7 +56,7 @@ class CategorySerializer(serializers.ModelSerializer):
 class TitleSerializer(serializers.ModelSerializer):
     genre = GenreSerializer(many=True, required=False)
     category = CategorySerializer(required=False)
-    rating = serializers.SerializerMethodField()
+    rating = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Title
@@ -50,11 +70,6 @@ class TitleSerializer(serializers.ModelSerializer):
             "category",
         )
 
-    def get_rating(self, obj):
-        rating = self.context["rating"]
-        if obj in rating:
-            return rating.get(pk=obj.pk).rating
-
 
 class TitleCreatySerializer(serializers.ModelSerializer):
     genre = serializers.SlugRelatedField(
@@ -80,11 +95,12 @@ class TitleCreatySerializer(serializers.ModelSerializer):
         return validate_year(value)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(PreviewModeMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field="username",
     )
+    text = serializers.CharField()
 
     class Meta:
         fields = ("id", "text", "author", "pub_date")
@@ -101,11 +117,12 @@ class CommentSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(PreviewModeMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field="username",
     )
+    text = serializers.CharField()
 
     class Meta:
         fields = ("id", "author", "text", "score", "pub_date")
@@ -113,7 +130,56 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserReviewSerializer(serializers.ModelSerializer):
+    title_name = serializers.CharField(source="title.name", read_only=True)
+    text = serializers.CharField(read_only=True)
+
+    class Meta:
+        fields = ("id", "title", "title_name", "text", "score", "pub_date")
+        model = Review
+
+
+class UserCommentSerializer(serializers.ModelSerializer):
+    title_name = serializers.CharField(source="title.name", read_only=True)
+    text = serializers.CharField(read_only=True)
+
+    class Meta:
+        fields = ("id", "title", "title_name", "review", "text", "pub_date")
+        model = Comment
+
+
+class UniqueUserMixin:
+    # Уникальность username и email проверяется без учёта регистра, как в
+    # индексах по lower(); гонку между запросами ловит сам индекс.
+    def validate_username(self, value):
+        return self.check_unique("username", value)
+
+    def validate_email(self, value):
+        return self.check_unique("email", value)
+
+    def check_unique(self, field_name, value):
+        queryset = User.objects.filter(
+            **{f"{field_name}__lower": value.lower()}
+        )
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+        if queryset.exists():
+            raise serializers.ValidationError(
+                f"Пользователь с таким {field_name} уже существует"
+            )
+        return value
+
+    def save(self, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                "Пользователь с таким username или email уже существует"
+            )
+
+
+class UserSerializer(UniqueUserMixin, serializers.ModelSerializer):
     class Meta:
         fields = (
             "username",
@@ -126,7 +192,7 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
 
 
-class UserNotAdminSerializer(serializers.ModelSerializer):
+class UserNotAdminSerializer(UniqueUserMixin, serializers.ModelSerializer):
     class Meta:
         fields = (
             "username",
@@ -141,10 +207,8 @@ class UserNotAdminSerializer(serializers.ModelSerializer):
 
 
 class RegisterSerializer(serializers.ModelSerializer):
-    username = serializers.CharField(
-        validators=[UniqueValidator(queryset=User.objects.all())],
-        required=True,
-    )
+    username = serializers.CharField(max_length=150, required=True)
+    email = serializers.EmailField(max_length=254, required=True)
 
     def validate_username(self, value):
         if value.lower() == "me":
@@ -153,6 +217,14 @@ class RegisterSerializer(serializers.ModelSerializer):
             )
         return value
 
+    def create(self, validated_data):
+        user = User.objects.signup(**validated_data)
+        if user is None:
+            raise serializers.ValidationError(
+                "Пользователь с таким username или email уже существует"
+            )
+        return user
+
     class Meta:
         fields = (
             "username",
@@ -171,3 +243,70 @@ class TokenSerializer(serializers.Serializer):
             "confirmation_code",
         )
         model = User
+
+
+class ModerationJobSerializer(serializers.ModelSerializer):
+    author = serializers.SlugRelatedField(
+        queryset=User.objects.all(),
+        slug_field="username",
+        required=False,
+        write_only=True,
+    )
+    since = serializers.DateTimeField(required=False, write_only=True)
+    until = serializers.DateTimeField(required=False, write_only=True)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        write_only=True,
+        max_length=100000,
+    )
+    filters = serializers.SerializerMethodField()
+
+    class Meta:
+        fields = (
+            "id",
+            "target",
+            "action",
+            "author",
+            "since",
+            "until",
+            "ids",
+            "filters",
+            "status",
+            "total",
+            "processed",
+            "created",
+            "finished",
+            "heartbeat",
+        )
+        read_only_fields = (
+            "status",
+            "total",
+            "processed",
+            "created",
+            "finished",
+            "heartbeat",
+        )
+        model = ModerationJob
+
+    def get_filters(self, obj):
+        return json.loads(obj.filters)
+
+    def validate(self, data):
+        if not {"author", "since", "until", "ids"} & data.keys():
+            raise serializers.ValidationError(
+                "Укажите хотя бы один фильтр: author, since, until или ids"
+            )
+        return data
+
+    def create(self, validated_data):
+        filters = {}
+        if "author" in validated_data:
+            filters["author"] = validated_data.pop("author").id
+        for name in ("since", "until"):
+            if name in validated_data:
+                filters[name] = validated_data.pop(name).isoformat()
+        if "ids" in validated_data:
+            filters["ids"] = validated_data.pop("ids")
+        validated_data["filters"] = json.dumps(filters)
+        return super().create(validated_data)
@@ -0,0 +1,45 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from . import caching
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog(sender, **kwargs):
+    caching.invalidate_slug_map(sender)
+    caching.bump_versions(caching.TITLES_VERSION, caching.CATALOG_VERSION)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title(
+    sender, instance, action="post_save", reverse=False, pk_set=None, **kwargs
+):
+    if not action.startswith("post_"):
+        return
+    title_ids = (pk_set or ()) if reverse else [instance.pk]
+    caching.bump_versions(
+        caching.TITLES_VERSION,
+        *[caching.title_tag(title_id) for title_id in title_ids]
+    )
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review(sender, instance, **kwargs):
+    caching.bump_versions(
+        caching.TITLES_VERSION,
+        caching.title_tag(instance.title_id),
+        caching.reviews_tag(instance.title_id),
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    caching.bump_version(caching.comments_tag(instance.title_id))
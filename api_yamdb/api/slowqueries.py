@@ -0,0 +1,172 @@
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, close_old_connections, connection
+
+from .metrics import resolve_view
+
+_write_lock = threading.Lock()
+PLACEHOLDERS = re.compile(r"\((?:%s, )*%s\)")
+
+
+def fingerprint(sql):
+    return PLACEHOLDERS.sub("(...)", " ".join(sql.split()))
+
+
+def explain(sql, params, analyze=False):
+    if connection.vendor == "postgresql":
+        options = "ANALYZE, BUFFERS, " if analyze else ""
+        prefix = f"EXPLAIN ({options}FORMAT JSON) "
+    elif connection.vendor == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        rows = cursor.fetchall()
+    if connection.vendor == "postgresql":
+        plan = rows[0][0]
+        return json.loads(plan) if isinstance(plan, str) else plan
+    return [row[-1] for row in rows]
+
+
+def store(records):
+    path = settings.SLOW_QUERY_LOG
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _write_lock, open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, default=str))
+            f.write("\n")
+
+
+# EXPLAIN выполняется в фоновом потоке со своим соединением, а не на пути
+# ответа. ANALYZE повторно исполняет медленный запрос, поэтому делается
+# лишь для первых SLOW_QUERY_ANALYZE_LIMIT записей каждого отпечатка;
+# остальные получают план без исполнения. При переполнении очереди
+# записи отбрасываются.
+class ExplainWorker:
+    def __init__(self, size, analyze_limit):
+        self.queue = queue.Queue(size)
+        self.analyze_limit = analyze_limit
+        self.analyzed = Counter()
+        self.thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, records):
+        with self._lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+        try:
+            self.queue.put_nowait(records)
+        except queue.Full:
+            pass
+
+    def run(self):
+        while True:
+            records = self.queue.get()
+            # Поток живёт весь срок воркера: соединение, закрытое базой
+            # или переросшее CONN_MAX_AGE, переоткрывается между пачками.
+            close_old_connections()
+            try:
+                for record in records:
+                    self.explain(record)
+                store(records)
+            finally:
+                close_old_connections()
+                self.queue.task_done()
+
+    def explain(self, record):
+        # Параметры нужны только для EXPLAIN: в них бывают email, коды
+        # подтверждения и тексты, поэтому в журнал они не попадают.
+        params = record.pop("params")
+        key = fingerprint(record["sql"])
+        analyze = self.analyzed[key] < self.analyze_limit
+        if analyze:
+            self.analyzed[key] += 1
+        record["fingerprint"] = key
+        record["analyze"] = analyze
+        try:
+            record["plan"] = explain(record["sql"], params, analyze)
+        except DatabaseError as error:
+            record["plan"] = None
+            record["error"] = str(error)
+
+
+_worker = None
+
+
+def get_worker():
+    global _worker
+    if _worker is None:
+        _worker = ExplainWorker(
+            settings.SLOW_QUERY_QUEUE_SIZE, settings.SLOW_QUERY_ANALYZE_LIMIT
+        )
+    return _worker
+
+
+class SlowQueryRecorder:
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            if (
+                duration >= self.threshold
+                and not many
+                and sql.lstrip()[:6].upper() == "SELECT"
+            ):
+                self.queries.append((sql, params, duration))
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SLOW_QUERY_SAMPLE_RATE:
+            return self.get_response(request)
+        request.slow_query_view = ("", "")
+        recorder = SlowQueryRecorder(settings.SLOW_QUERY_THRESHOLD_MS)
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        if recorder.queries:
+            self.capture(request, recorder.queries)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.slow_query_view = resolve_view(view_func, request.method)
+
+    def capture(self, request, queries):
+        view, action = request.slow_query_view
+        get_worker().submit(
+            [
+                {
+                    "time": time.time(),
+                    "vendor": connection.vendor,
+                    "view": view,
+                    "action": action,
+                    "method": request.method,
+                    "path": request.path,
+                    "duration_ms": round(duration, 3),
+                    "sql": sql,
+                    "params": list(params or ()),
+                }
+                for sql, params, duration in queries
+            ]
+        )
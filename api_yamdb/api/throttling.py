@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    num, period = rate.split("/")
+    return int(num), DURATIONS[period[0]]
+
+
+class LocalMemoryBucketBackend:
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate, now):
+        with self._lock:
+            tokens, stamp = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - stamp) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return allowed, tokens
+
+
+# Общий кеш не умеет сравнение с обменом, поэтому чтение и запись
+# корзины защищены блокировкой на cache.add (атомарен в memcached).
+# Не дождавшись блокировки, запрос отклоняется: для эндпоинтов
+# аутентификации лучше отказать, чем пропустить всплеск.
+class CacheBucketBackend:
+    lock_timeout = 1
+    lock_attempts = 5
+    lock_poll = 0.01
+
+    def __init__(self, alias="default"):
+        self.cache = caches[alias]
+
+    def consume(self, key, capacity, refill_rate, now):
+        lock_key = f"{key}_lock"
+        for attempt in range(self.lock_attempts):
+            if self.cache.add(lock_key, 1, self.lock_timeout):
+                break
+            time.sleep(self.lock_poll)
+        else:
+            return False, 0
+        try:
+            tokens, stamp = self.cache.get(key, (capacity, now))
+            tokens = min(
+                capacity, tokens + max(0, now - stamp) * refill_rate
+            )
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.cache.set(
+                key, (tokens, now), int(capacity / refill_rate) + 1
+            )
+        finally:
+            self.cache.delete(lock_key)
+        return allowed, tokens
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        options = dict(getattr(settings, "THROTTLE_BACKEND", {}))
+        backend_class = import_string(
+            options.pop("BACKEND", "api.throttling.LocalMemoryBucketBackend")
+        )
+        _backend = backend_class(**options)
+    return _backend
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+    # Настенные часы: метки в общем кеше сравниваются между хостами.
+    timer = time.time
+
+    def __init__(self):
+        self.capacity, duration = parse_rate(
+            api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        )
+        self.refill_rate = self.capacity / duration
+        self.tokens = self.capacity
+
+    def get_ident_key(self, request):
+        raise NotImplementedError(".get_ident_key() must be overridden")
+
+    def allow_request(self, request, view):
+        ident = self.get_ident_key(request)
+        if ident is None:
+            return True
+        allowed, self.tokens = get_backend().consume(
+            f"throttle_{self.scope}_{ident}",
+            self.capacity,
+            self.refill_rate,
+            self.timer(),
+        )
+        return allowed
+
+    def wait(self):
+        return (1 - self.tokens) / self.refill_rate
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    scope = "auth_ip"
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
+
+
+class AuthUsernameThrottle(TokenBucketThrottle):
+    scope = "auth_username"
+
+    def get_ident_key(self, request):
+        username = request.data.get("username")
+        if not isinstance(username, str) or not username:
+            return None
+        return username.lower()[:150]
@@ -1,13 +1,15 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework import routers
 
 from .views import (
     CaregoryViewSet,
     CommentViewSet,
     GenreViewSet,
+    ModerationJobViewSet,
     ReviewViewSet,
     TitleViewSet,
     UserViewSet,
+    download_profile,
     get_user_token,
     register_user_send_code,
 )
@@ -38,8 +40,16 @@ router_v1.register(
     basename="review",
 )
 router_v1.register(r"users", UserViewSet, basename="users")
+router_v1.register(
+    r"moderation", ModerationJobViewSet, basename="moderation"
+)
 urlpatterns = [
     path("v1/", include(router_v1.urls)),
     path("v1/auth/signup/", register_user_send_code, name="register"),
     path("v1/auth/token/", get_user_token, name="token"),
+    re_path(
+        r"^v1/profiles/(?P<profile_id>[0-9a-f]{32}\.(?:prof|collapsed))/$",
+        download_profile,
+        name="profile",
+    ),
 ]
@@ -1,11 +1,19 @@
+import os
+
 from django.conf import settings
-from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
 from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import DatabaseError
+from django.http import FileResponse, Http404, JsonResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, serializers, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (
+    action,
+    api_view,
+    permission_classes,
+    throttle_classes,
+)
 from rest_framework.pagination import (
     LimitOffsetPagination,
     PageNumberPagination,
@@ -14,22 +22,48 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import AccessToken
 
-from reviews.models import Category, Genre, Review, Title, User
-from .filters import ModelFilter
-from .pagination import CommentPagination
-from .permissions import IsAdminOnly, IsAdminOrReadOnly, IsOwnerAdminModerator
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    ModerationJob,
+    Review,
+    Title,
+    User,
+)
+from . import caching, metrics
+from .caching import AnonymousResponseCacheMixin
+from .confirmation import consume_code, issue_code
+from .filters import LowerExactSearchFilter, ModelFilter, count_facets
+from .moderation import start_job
+from .pagination import (
+    AuthorFeedPagination,
+    CommentPagination,
+    TitlePagination,
+)
+from .permissions import (
+    IsAdminOnly,
+    IsAdminOrReadOnly,
+    IsModeratorOrAdmin,
+    IsOwnerAdminModerator,
+)
 from .serializers import (
     CategorySerializer,
     CommentSerializer,
     GenreSerializer,
+    ModerationJobSerializer,
     RegisterSerializer,
     ReviewSerializer,
     TitleCreatySerializer,
     TitleSerializer,
     TokenSerializer,
+    UserCommentSerializer,
     UserNotAdminSerializer,
+    UserReviewSerializer,
     UserSerializer,
 )
+from .throttling import AuthIPThrottle, AuthUsernameThrottle
+from .warmup import state as warmup_state, warm_worker
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -37,7 +71,7 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = (IsAdminOnly,)
     pagination_class = LimitOffsetPagination
-    filter_backends = (filters.SearchFilter,)
+    filter_backends = (LowerExactSearchFilter,)
     search_fields = ("=username",)
     lookup_field = "username"
 
@@ -68,11 +102,48 @@ class UserViewSet(viewsets.ModelViewSet):
             serializer.save(role=user.role)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def author_feed(self, queryset, fields):
+        queryset = (
+            queryset.filter(author=self.request.user, is_hidden=False)
+            .select_related("title", "body")
+            .only(*fields, "title__name", "body__text")
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path="me/reviews",
+        permission_classes=(IsAuthenticated,),
+        serializer_class=UserReviewSerializer,
+        pagination_class=AuthorFeedPagination,
+    )
+    def my_reviews(self, request):
+        return self.author_feed(
+            Review.objects.all(),
+            ("id", "title_id", "score", "pub_date"),
+        )
+
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path="me/comments",
+        permission_classes=(IsAuthenticated,),
+        serializer_class=UserCommentSerializer,
+        pagination_class=AuthorFeedPagination,
+    )
+    def my_comments(self, request):
+        return self.author_feed(
+            Comment.objects.all(),
+            ("id", "title_id", "review_id", "pub_date"),
+        )
+
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all()
+class TitleViewSet(AnonymousResponseCacheMixin, viewsets.ModelViewSet):
     serializer_class = TitleSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = TitlePagination
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = ModelFilter
@@ -82,11 +153,68 @@ class TitleViewSet(viewsets.ModelViewSet):
             return TitleSerializer
         return TitleCreatySerializer
 
-    def get_serializer_context(self):
-        context = super(TitleViewSet, self).get_serializer_context()
-        reviews = Title.objects.annotate(rating=Avg("reviews__score"))
-        context.update({"rating": reviews})
-        return context
+    def get_cache_tags(self):
+        if self.action in ("list", "facets"):
+            return [caching.TITLES_VERSION]
+        if self.action == "retrieve":
+            return [
+                caching.CATALOG_VERSION,
+                caching.title_tag(self.kwargs["pk"]),
+            ]
+        return None
+
+    def get_queryset(self):
+        return (
+            Title.objects.select_related("category")
+            .prefetch_related("genre")
+            .with_rating()
+            .order_by("id")
+        )
+
+    def get_count_queryset(self):
+        # Для подсчёта не нужны ни связи, ни рейтинг, если по нему
+        # не фильтруют.
+        queryset = Title.objects.all()
+        if "min_rating" in self.request.query_params:
+            queryset = queryset.with_rating()
+        return self.filter_queryset(queryset)
+
+    def retrieve(self, request, *args, **kwargs):
+        local_cache = caching.get_title_detail_cache()
+        key = str(kwargs["pk"])
+        tags = [caching.CATALOG_VERSION, caching.title_tag(key)]
+        data = local_cache.get(key, tags)
+        if data is not None:
+            metrics.inc(
+                metrics.CACHE_REQUESTS, cache="title_detail", result="hit"
+            )
+            response = Response(data)
+            response.skip_response_cache = True
+            return response
+        metrics.inc(
+            metrics.CACHE_REQUESTS, cache="title_detail", result="miss"
+        )
+        # Версии читаются до запроса к БД: изменение, случившееся во время
+        # чтения, не будет замаскировано новой версией.
+        versions = caching.get_versions(tags)
+        response = super().retrieve(request, *args, **kwargs)
+        local_cache.set(key, versions, dict(response.data))
+        return response
+
+    @action(methods=["get"], detail=False, url_path="facets")
+    def facets(self, request):
+        key = "title_facets_{}_{}".format(
+            caching.get_version(caching.TITLES_VERSION),
+            caching.params_signature(
+                request.query_params, ModelFilter.base_filters
+            ),
+        )
+        facets = cache.get(key)
+        if facets is None:
+            titles = self.filter_queryset(self.get_queryset())
+            facets = count_facets(titles.values("pk"))
+            cache.set(key, facets, settings.FACETS_CACHE_TIMEOUT)
+        return Response(facets)
 
 
 class GenreViewSet(
@@ -119,15 +247,39 @@ class CaregoryViewSet(
     lookup_field = "slug"
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class PreviewListMixin:
+    def is_preview(self):
+        return self.action == "list" and self.request.query_params.get(
+            "preview"
+        ) in ("1", "true")
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["preview"] = self.is_preview()
+        return context
+
+    def preview_queryset(self, queryset):
+        if self.is_preview():
+            return queryset
+        return queryset.select_related("body")
+
+
+class ReviewViewSet(
+    PreviewListMixin, AnonymousResponseCacheMixin, viewsets.ModelViewSet
+):
     serializer_class = ReviewSerializer
     pagination_class = PageNumberPagination
     permission_classes = (IsOwnerAdminModerator,)
 
+    def get_cache_tags(self):
+        if self.action in ("list", "retrieve"):
+            return [caching.reviews_tag(self.kwargs["title_id"])]
+        return None
+
     def get_queryset(self):
         title = get_object_or_404(Title, id=self.kwargs.get("title_id"))
-        new_queryset = title.reviews.all()
-        return new_queryset
+        new_queryset = title.reviews.filter(is_hidden=False)
+        return self.preview_queryset(new_queryset)
 
     def perform_create(self, serializer):
         title = get_object_or_404(Title, id=self.kwargs.get("title_id"))
@@ -138,34 +290,59 @@ class ReviewViewSet(viewsets.ModelViewSet):
         serializer.save(author=self.request.user, title=title)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class ModerationJobViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = ModerationJob.objects.all()
+    serializer_class = ModerationJobSerializer
+    pagination_class = LimitOffsetPagination
+    permission_classes = (IsModeratorOrAdmin,)
+
+    def perform_create(self, serializer):
+        job = serializer.save(moderator=self.request.user)
+        start_job(job)
+        job.refresh_from_db()
+
+
+class CommentViewSet(
+    PreviewListMixin, AnonymousResponseCacheMixin, viewsets.ModelViewSet
+):
     serializer_class = CommentSerializer
     pagination_class = CommentPagination
     permission_classes = (IsOwnerAdminModerator,)
 
+    def get_cache_tags(self):
+        if self.action in ("list", "retrieve"):
+            return [caching.comments_tag(self.kwargs["title_id"])]
+        return None
+
     def get_queryset(self):
         review = get_object_or_404(Title, id=self.kwargs.get("title_id"))
-        new_queryset = review.comments.all()
-        return new_queryset
+        new_queryset = review.comments.filter(is_hidden=False)
+        return self.preview_queryset(new_queryset)
 
     def perform_create(self, serializer):
-        review = get_object_or_404(Review, id=self.kwargs.get("title_id"))
-        title = get_object_or_404(Title, id=self.kwargs.get("title_id"))
-        serializer.save(author=self.request.user, review=review, title=title)
+        review = get_object_or_404(
+            Review.objects.select_related("title"),
+            id=self.kwargs.get("review_id"),
+            title_id=self.kwargs.get("title_id"),
+        )
+        serializer.save(
+            author=self.request.user, review=review, title=review.title
+        )
 
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([AuthIPThrottle, AuthUsernameThrottle])
 def register_user_send_code(request):
     serializer = RegisterSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    serializer.save()
-    user = get_object_or_404(
-        User,
-        username=serializer.validated_data["username"],
-        email=serializer.validated_data["email"],
-    )
-    confirmation_code = default_token_generator.make_token(user)
+    user = serializer.save()
+    confirmation_code = issue_code(user)
     send_mail(
         "Registration in YaMDb",
         f"Your confirmation code is {confirmation_code}",
@@ -178,12 +355,14 @@ def register_user_send_code(request):
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([AuthIPThrottle, AuthUsernameThrottle])
 def get_user_token(request):
     serializer = TokenSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     try:
         user = get_object_or_404(
-            User, username=serializer.validated_data["username"]
+            User.objects.only("id", "email", "confirmation_code"),
+            username__lower=serializer.validated_data["username"].lower(),
         )
     except User.DoesNotExist:
         return Response(
@@ -191,9 +370,37 @@ def get_user_token(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    if not default_token_generator.check_token(
-        user, serializer.validated_data["confirmation_code"]
-    ):
+    if not consume_code(user, serializer.validated_data["confirmation_code"]):
+        metrics.inc(
+            metrics.AUTH_FAILURES, view="get_user_token", reason="invalid_code"
+        )
         return Response(status=status.HTTP_400_BAD_REQUEST)
     access = AccessToken.for_user(user)
     return Response({"access": str(access)}, status=status.HTTP_201_CREATED)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminOnly])
+def download_profile(request, profile_id):
+    path = os.path.join(settings.PROFILER_DIR, profile_id)
+    if not os.path.isfile(path):
+        raise Http404
+    return FileResponse(open(path, "rb"), as_attachment=True)
+
+
+def readiness(request):
+    # Под gunicorn прогрев выполняет post_worker_init; под runserver и
+    # другими серверами он происходит при первом обращении к /ready.
+    if not warmup_state["worker_ready"]:
+        try:
+            warm_worker()
+        except DatabaseError:
+            pass
+    return JsonResponse(
+        warmup_state,
+        status=(
+            status.HTTP_200_OK
+            if warmup_state["worker_ready"]
+            else status.HTTP_503_SERVICE_UNAVAILABLE
+        ),
+    )
@@ -0,0 +1,90 @@
+import os
+import time
+from collections import OrderedDict
+
+from django.apps import apps
+from django.db import connection, connections
+from django.urls import get_resolver
+from django.urls.resolvers import URLResolver
+from rest_framework.utils import model_meta
+from rest_framework.viewsets import ViewSetMixin
+
+from reviews.models import Category, Genre
+from .caching import get_slug_map
+
+state = {"app_ready": False, "worker_ready": False, "timings": OrderedDict()}
+
+
+def timed(name):
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            state["timings"][name] = round(
+                (time.perf_counter() - start) * 1000, 2
+            )
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def iter_views(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_views(pattern.url_patterns)
+        else:
+            yield pattern.callback
+
+
+@timed("url_resolver")
+def compile_urls():
+    resolver = get_resolver()
+    resolver._populate()
+    return list(iter_views(resolver.url_patterns))
+
+
+@timed("model_meta")
+def build_model_meta(views):
+    # get_field_info сам ничего не кеширует, но заполняет cached_property
+    # в Model._meta (fields, fields_map, related_objects), которые живут
+    # всё время процесса и иначе строятся на первых запросах.
+    for model in apps.get_models():
+        model._meta.get_fields()
+    for view in views:
+        view_class = getattr(view, "cls", None)
+        if view_class is None or not issubclass(view_class, ViewSetMixin):
+            continue
+        serializer_class = getattr(view_class, "serializer_class", None)
+        model = getattr(getattr(serializer_class, "Meta", None), "model", None)
+        if model is not None:
+            model_meta.get_field_info(model)
+
+
+@timed("database")
+def connect_database():
+    connection.ensure_connection()
+
+
+@timed("caches")
+def prime_caches():
+    get_slug_map(Genre)
+    get_slug_map(Category)
+
+
+def warm_app():
+    # Безопасно для gunicorn --preload: в мастере не открываем соединения
+    # с БД, они не должны наследоваться воркерами.
+    build_model_meta(compile_urls())
+    connections.close_all()
+    state["app_ready"] = True
+
+
+def warm_worker():
+    if not state["app_ready"]:
+        warm_app()
+    connect_database()
+    prime_caches()
+    state["worker_ready"] = True
+    state["pid"] = os.getpid()
@@ -33,6 +33,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "api.metrics.MetricsMiddleware",
+    "api.compression.CompressionMiddleware",
+    "api.profiling.ProfilerMiddleware",
+    "api.slowqueries.SlowQueryMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -69,7 +73,17 @@ DATABASES = {
         'USER': DB_USER,
         'PASSWORD': DB_PASSWORD,
         'HOST': DB_HOST,
-        'PORT': DB_PORT
+        'PORT': DB_PORT,
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0)),
+    }
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
     }
 }
 
@@ -109,7 +123,14 @@ AUTH_USER_MODEL = "reviews.User"
 
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 
-EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
+EMAIL_FILE_PATH = os.getenv(
+    "EMAIL_FILE_PATH", os.path.join(BASE_DIR, "sent_emails")
+)
+
+CONFIRMATION_CODE_TTL = int(os.getenv("CONFIRMATION_CODE_TTL", 15 * 60))
+CONFIRMATION_CODE_MAX_ATTEMPTS = int(
+    os.getenv("CONFIRMATION_CODE_MAX_ATTEMPTS", 5)
+)
 
 DEFAULT_FROM_EMAIL = "admin@yamdb.ru"
 CONTACT_EMAIL = "admin@yamdb.ru"
@@ -123,6 +144,69 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ],
+    # За nginx адрес клиента берётся из X-Forwarded-For, который nginx
+    # дописывает сам; подставленные клиентом значения левее игнорируются.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", 1)),
+    "DEFAULT_THROTTLE_RATES": {
+        "auth_ip": os.getenv("THROTTLE_AUTH_IP", "20/min"),
+        "auth_username": os.getenv("THROTTLE_AUTH_USERNAME", "5/min"),
+    },
+}
+
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_LEVEL = 5
+COMPRESSION_CACHE_BYTES = 16 * 1024 * 1024
+
+# Задачи выполняет команда run_moderation_jobs (в docker-compose — сервис
+# moderation), POST сразу возвращает id задачи. При False задача целиком
+# выполняется внутри запроса: так удобно только в разработке и тестах.
+MODERATION_ASYNC = os.getenv("MODERATION_ASYNC", "True") == "True"
+# Задача без признаков жизни дольше этого срока считается брошенной.
+MODERATION_STALE_AFTER = 60
+MODERATION_BATCH_SIZE = 500
+
+FACETS_CACHE_TIMEOUT = 5 * 60
+TITLE_COUNT_CACHE_TIMEOUT = 30
+TITLE_COUNT_WORKERS = int(os.getenv("TITLE_COUNT_WORKERS", 4))
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "True") == "True"
+RESPONSE_CACHE_TIMEOUT = 10 * 60
+RESPONSE_CACHE_LOCK_TIMEOUT = 5
+RESPONSE_CACHE_LOCK_POLL = 0.05
+
+TITLE_DETAIL_CACHE_BYTES = int(
+    os.getenv("TITLE_DETAIL_CACHE_BYTES", 4 * 1024 * 1024)
+)
+TITLE_DETAIL_CACHE_TIMEOUT = 5 * 60
+TITLE_DETAIL_CACHE_JITTER = 0.1
+TITLE_DETAIL_STALENESS = float(os.getenv("TITLE_DETAIL_STALENESS", 1.0))
+
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = 5
+
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "False") == "True"
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", 0))
+PROFILER_MODE = os.getenv("PROFILER_MODE", "cprofile")
+PROFILER_INTERVAL = 0.005
+PROFILER_DIR = os.path.join(BASE_DIR, "profiles")
+# Старые профили удаляются, когда каталог выходит за любой из лимитов.
+PROFILER_MAX_FILES = int(os.getenv("PROFILER_MAX_FILES", 200))
+PROFILER_MAX_BYTES = int(os.getenv("PROFILER_MAX_BYTES", 100 * 1024 * 1024))
+
+SLOW_QUERY_ENABLED = os.getenv("SLOW_QUERY_ENABLED", "False") == "True"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 100))
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", 1))
+SLOW_QUERY_ANALYZE_LIMIT = int(os.getenv("SLOW_QUERY_ANALYZE_LIMIT", 3))
+SLOW_QUERY_QUEUE_SIZE = 100
+SLOW_QUERY_LOG = os.getenv(
+    "SLOW_QUERY_LOG", os.path.join(BASE_DIR, "slow_queries", "queries.jsonl")
+)
+
+THROTTLE_BACKEND = {
+    "BACKEND": os.getenv(
+        "THROTTLE_BACKEND", "api.throttling.LocalMemoryBucketBackend"
+    ),
 }
 
 SIMPLE_JWT = {
@@ -2,9 +2,14 @@ from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import TemplateView
 
+from api.metrics import metrics_view
+from api.views import readiness
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
+    path("metrics", metrics_view, name="metrics"),
+    path("ready", readiness, name="ready"),
     path(
         "redoc/",
         TemplateView.as_view(template_name="redoc.html"),
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_yamdb.settings")
 
 application = get_wsgi_application()
+
+from api.warmup import warm_app  # noqa: E402
+
+warm_app()
@@ -0,0 +1,29 @@
+import os
+
+bind = "0:8000"
+workers = int(os.getenv("GUNICORN_WORKERS", 3))
+preload_app = True
+
+
+def on_starting(server):
+    from api.metrics import reset
+
+    reset()
+
+
+def post_worker_init(worker):
+    from api.warmup import warm_worker
+
+    warm_worker()
+
+
+def worker_exit(server, worker):
+    from api.metrics import flush
+
+    flush(force=True)
+
+
+def child_exit(server, worker):
+    from api.metrics import retire
+
+    retire(worker.pid)
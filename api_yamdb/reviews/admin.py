@@ -1,25 +1,60 @@
+from django import forms
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
 
-from .models import Category, Genre, Title, User, Comment, Review
+from .models import (
+    Category,
+    Comment,
+    Genre,
+    ModerationJob,
+    Review,
+    Title,
+    User,
+)
+
+ESTIMATE_THRESHOLD = 100000
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if connection.vendor == "postgresql" and not query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class "
+                    "WHERE relname = %s",
+                    [self.object_list.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row is not None and row[0] > ESTIMATE_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = "-пусто-"
 
 
 @admin.register(Title)
-class TitleAdmin(admin.ModelAdmin):
+class TitleAdmin(LargeTableAdmin):
     list_display = (
         "pk",
         "name",
-        "description",
         "category",
         "year",
     )
-    search_fields = (
-        "pk",
-        "name",
-        "year",
-    )
-    list_editable = ("category",)
-    list_filter = ("name", "year", "category", "genre")
-    empty_value_display = "-пусто-"
+    search_fields = ("name",)
+    list_select_related = ("category",)
+    list_filter = ("category",)
+    autocomplete_fields = ("category", "genre")
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer("description")
 
 
 @admin.register(Genre)
@@ -61,28 +96,85 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(LargeTableAdmin):
     list_display = (
         "pk",
         "username",
         "email",
         "role",
-        "bio",
         "first_name",
         "last_name",
     )
     search_fields = (
-        "pk",
-        "username",
-        "role",
-        "email",
+        "=username",
+        "=email",
     )
-    list_filter = (
-        "username",
-        "email",
-    )
-    empty_value_display = "-пусто-"
+    list_filter = ("role",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer("bio")
+
+
+class TextBodyForm(forms.ModelForm):
+    # text — свойство модели поверх таблицы тел, ModelForm его не видит.
+    text = forms.CharField(label="Текст", widget=forms.Textarea)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk is not None:
+            self.initial.setdefault("text", self.instance.text)
+
+    def save(self, commit=True):
+        self.instance.text = self.cleaned_data["text"]
+        return super().save(commit)
+
+
+class TextPreviewAdmin(LargeTableAdmin):
+    form = TextBodyForm
+    deferred_fields = ()
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer(*self.deferred_fields)
 
+    def short_text(self, obj):
+        return obj.preview
 
-admin.site.register(Review)
-admin.site.register(Comment)
+    short_text.short_description = "Текст"
+
+
+@admin.register(Review)
+class ReviewAdmin(TextPreviewAdmin):
+    list_display = ("pk", "short_text", "score", "author", "title", "pub_date")
+    list_select_related = ("author", "title")
+    raw_id_fields = ("author", "title")
+    search_fields = ("=author__username",)
+    list_filter = ("is_hidden",)
+    deferred_fields = ("title__description", "author__bio")
+
+
+@admin.register(Comment)
+class CommentAdmin(TextPreviewAdmin):
+    list_display = ("pk", "short_text", "author", "review_id", "pub_date")
+    list_select_related = ("author",)
+    raw_id_fields = ("author", "review", "title")
+    search_fields = ("=author__username",)
+    list_filter = ("is_hidden",)
+    deferred_fields = ("author__bio",)
+
+
+@admin.register(ModerationJob)
+class ModerationJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "pk",
+        "moderator",
+        "target",
+        "action",
+        "status",
+        "processed",
+        "total",
+        "created",
+        "finished",
+    )
+    list_select_related = ("moderator",)
+    list_filter = ("status", "target", "action")
+    raw_id_fields = ("moderator",)
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews import scores
+
+
+class Command(BaseCommand):
+    help = "Сворачивает журнал изменений оценок в агрегаты произведений"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Повторять каждые N секунд вместо однократного запуска",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Пересчитать агрегаты по всем отзывам",
+        )
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            scores.rebuild()
+            self.stdout.write("Агрегаты пересчитаны")
+            return
+        while True:
+            compacted = scores.compact(options["batch_size"])
+            if options["verbosity"] > 1 or not options["interval"]:
+                self.stdout.write(f"Свёрнуто записей: {compacted}")
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from reviews.synthetic import generate
+
+
+class Command(BaseCommand):
+    help = "Наполняет базу детерминированными синтетическими данными"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--titles", type=int, default=500)
+        parser.add_argument("--genres", type=int, default=20)
+        parser.add_argument("--categories", type=int, default=5)
+        parser.add_argument("--reviews", type=int, default=5000)
+        parser.add_argument("--comments", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        created = generate(
+            users=options["users"],
+            titles=options["titles"],
+            genres=options["genres"],
+            categories=options["categories"],
+            reviews=options["reviews"],
+            comments=options["comments"],
+            seed=options["seed"],
+        )
+        for name, count in created.items():
+            self.stdout.write(f"{name}: {count}")
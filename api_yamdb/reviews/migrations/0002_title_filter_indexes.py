@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-19 13:51
+
+import api.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='year',
+            field=models.IntegerField(db_index=True, validators=[api.validators.validate_year], verbose_name='Год'),
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX reviews_title_genre_genre_title_idx '
+            'ON reviews_title_genre (genre_id, title_id);',
+            'DROP INDEX reviews_title_genre_genre_title_idx;',
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 2.2.16 on 2026-10-19 13:55
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+import reviews.models
+
+
+def check_duplicates(apps, schema_editor):
+    User = apps.get_model('reviews', 'User')
+    for field in ('username', 'email'):
+        duplicates = list(
+            User.objects.order_by()
+            .values(value=Lower(field))
+            .annotate(total=Count('id'))
+            .filter(total__gt=1)
+            .values_list('value', flat=True)[:20]
+        )
+        if duplicates:
+            raise RuntimeError(
+                f'Поле {field} совпадает без учёта регистра у нескольких '
+                f'пользователей: {", ".join(duplicates)}. Объедините или '
+                f'переименуйте их и повторите миграцию.'
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_moderation'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', reviews.models.YamdbUserManager()),
+            ],
+        ),
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop),
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX reviews_user_username_lower_uniq '
+            'ON reviews_user (lower(username));',
+            'DROP INDEX reviews_user_username_lower_uniq;',
+        ),
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX reviews_user_email_lower_uniq '
+            'ON reviews_user (lower(email));',
+            'DROP INDEX reviews_user_email_lower_uniq;',
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:01
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+
+def fill_scores(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    totals = (
+        Review.objects.filter(is_hidden=False)
+        .order_by()
+        .values('title_id')
+        .annotate(score_total=Sum('score'), count_total=Count('id'))
+    )
+    for row in totals:
+        Title.objects.filter(id=row['title_id']).update(
+            score_sum=row['score_total'], score_count=row['count_total']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_user_lower_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='score_count',
+            field=models.IntegerField(default=0, verbose_name='Число оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.IntegerField(default=0, verbose_name='Сумма оценок'),
+        ),
+        migrations.CreateModel(
+            name='ScoreDelta',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.IntegerField()),
+                ('count', models.SmallIntegerField()),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_deltas', to='reviews.Title')),
+            ],
+            options={
+                'verbose_name': 'Изменение оценок',
+                'verbose_name_plural': 'Изменения оценок',
+            },
+        ),
+        migrations.RunPython(fill_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:13
+
+from django.db import migrations, models
+from django.db.models.functions import Substr
+
+
+def fill_previews(apps, schema_editor):
+    for name in ('Review', 'Comment'):
+        model = apps.get_model('reviews', name)
+        model.objects.update(preview=Substr('text', 1, 80))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_score_journal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='preview',
+            field=models.CharField(blank=True, editable=False, max_length=80, verbose_name='Превью'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='preview',
+            field=models.CharField(blank=True, editable=False, max_length=80, verbose_name='Превью'),
+        ),
+        migrations.RunPython(fill_previews, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_text_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='moderationjob',
+            name='heartbeat',
+            field=models.DateTimeField(null=True, verbose_name='Последний признак жизни'),
+        ),
+    ]
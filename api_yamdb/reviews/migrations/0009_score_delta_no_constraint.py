@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_moderation_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scoredelta',
+            name='title',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='score_deltas', to='reviews.Title'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_score_delta_no_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentBody',
+            fields=[
+                ('comment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='body', serialize=False, to='reviews.Comment')),
+                ('text', models.TextField()),
+            ],
+            options={
+                'verbose_name': 'Текст комментария',
+                'verbose_name_plural': 'Тексты комментариев',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReviewBody',
+            fields=[
+                ('review', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='body', serialize=False, to='reviews.Review')),
+                ('text', models.TextField()),
+            ],
+            options={
+                'verbose_name': 'Текст отзыва',
+                'verbose_name_plural': 'Тексты отзывов',
+            },
+        ),
+        migrations.RunSQL(
+            'INSERT INTO reviews_commentbody (comment_id, text) '
+            'SELECT id, text FROM reviews_comment;',
+            'UPDATE reviews_comment SET text = COALESCE(('
+            'SELECT text FROM reviews_commentbody '
+            'WHERE comment_id = reviews_comment.id), \'\');',
+        ),
+        migrations.RunSQL(
+            'INSERT INTO reviews_reviewbody (review_id, text) '
+            'SELECT id, text FROM reviews_review;',
+            'UPDATE reviews_review SET text = COALESCE(('
+            'SELECT text FROM reviews_reviewbody '
+            'WHERE review_id = reviews_review.id), \'\');',
+        ),
+        # Значение по умолчанию нужно только для отката: столбец text
+        # возвращается в заполненную таблицу.
+        migrations.AlterField(
+            model_name='comment',
+            name='text',
+            field=models.TextField(default=''),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='text',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='comment',
+            name='text',
+        ),
+        migrations.RemoveField(
+            model_name='review',
+            name='text',
+        ),
+    ]
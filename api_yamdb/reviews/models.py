@@ -1,10 +1,43 @@
-from django.db import models
-from django.contrib.auth.models import AbstractUser
-from django.db.models import UniqueConstraint
+from django.db import IntegrityError, models, transaction
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.db.models import (
+    Case,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    UniqueConstraint,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce, Lower
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.validators import MaxValueValidator, MinValueValidator
 
 from api.validators import validate_year
 
+models.CharField.register_lookup(Lower)
+
+PREVIEW_LENGTH = 80
+
+
+class YamdbUserManager(UserManager):
+    def signup(self, username, email):
+        try:
+            with transaction.atomic():
+                return self.create(username=username, email=email)
+        except IntegrityError:
+            pass
+        for user in self.filter(
+            Q(username__lower=username.lower()) | Q(email__lower=email.lower())
+        ):
+            if (
+                user.username.lower() == username.lower()
+                and user.email.lower() == email.lower()
+            ):
+                return user
+        return None
+
 
 class User(AbstractUser):
     ADMIN = "admin"
@@ -25,12 +58,15 @@ class User(AbstractUser):
     last_name = models.CharField(max_length=150, blank=True)
     bio = models.TextField(blank=True)
     role = models.CharField(max_length=20, choices=ROLES, default=USER)
+    # Одноразовая метка для кодов подтверждения (см. api/confirmation.py).
     confirmation_code = models.CharField(
         max_length=150, blank=False, null=True
     )
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ("username",)
 
+    objects = YamdbUserManager()
+
     def __str__(self):
         return self.username
 
@@ -67,6 +103,34 @@ class Genre(models.Model):
         return self.slug
 
 
+class TitleQuerySet(models.QuerySet):
+    def with_rating(self):
+        pending = (
+            ScoreDelta.objects.filter(title=OuterRef("pk"))
+            .order_by()
+            .values("title")
+        )
+        pending_score = pending.annotate(total=Sum("score")).values("total")
+        pending_count = pending.annotate(total=Sum("count")).values("total")
+        return self.annotate(
+            rating_sum=F("score_sum")
+            + Coalesce(
+                Subquery(pending_score, output_field=models.IntegerField()), 0
+            ),
+            rating_count=F("score_count")
+            + Coalesce(
+                Subquery(pending_count, output_field=models.IntegerField()), 0
+            ),
+        ).annotate(
+            rating=Case(
+                When(rating_count=0, then=None),
+                default=Cast("rating_sum", models.FloatField())
+                / F("rating_count"),
+                output_field=models.FloatField(),
+            )
+        )
+
+
 class Title(models.Model):
     category = models.ForeignKey(
         Category,
@@ -82,8 +146,14 @@ class Title(models.Model):
         db_index=True,
     )
     name = models.TextField("Название")
-    year = models.IntegerField("Год", validators=[validate_year])
+    year = models.IntegerField(
+        "Год", validators=[validate_year], db_index=True
+    )
     description = models.TextField("Описание", blank=True, null=True)
+    score_sum = models.IntegerField("Сумма оценок", default=0)
+    score_count = models.IntegerField("Число оценок", default=0)
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Произведение"
@@ -93,8 +163,58 @@ class Title(models.Model):
         return self.name
 
 
-class Review(models.Model):
-    text = models.TextField()
+# Полный текст хранится в отдельной таблице 1:1 (ReviewBody, CommentBody),
+# а в строке отзыва или комментария остаётся только короткое превью:
+# сортировки, подсчёты и проверки владельца читают узкие строки. Свойство
+# text подгружает тело по требованию, списки берут его через
+# select_related("body").
+class TextBodyMixin:
+    @property
+    def text(self):
+        if "_text" not in self.__dict__:
+            self._text = ""
+            if self.pk is not None:
+                try:
+                    self._text = self.body.text
+                except ObjectDoesNotExist:
+                    pass
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        self._text = value
+        self._text_changed = True
+        self.preview = value[:PREVIEW_LENGTH]
+
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        text_changed = self.__dict__.pop("_text_changed", False)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "text" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "preview"} - {"text"}
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if text_changed:
+            related = type(self).body.related
+            body = related.related_model(
+                **{related.field.name: self, "text": self._text}
+            )
+            body.save(force_insert=adding)
+            related.set_cached_value(self, body)
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.__dict__.pop("_text", None)
+        self.__dict__.pop("_text_changed", None)
+
+    def __str__(self):
+        return self.preview
+
+
+class Review(TextBodyMixin, models.Model):
+    preview = models.CharField(
+        "Превью", max_length=PREVIEW_LENGTH, blank=True, editable=False
+    )
     score = models.IntegerField(
         default=1,
         validators=[
@@ -109,19 +229,66 @@ class Review(models.Model):
     title = models.ForeignKey(
         Title, on_delete=models.CASCADE, related_name="reviews"
     )
-
-    def __str__(self):
-        return self.text
+    is_hidden = models.BooleanField("Скрыт модератором", default=False)
 
     class Meta:
         ordering = ("pub_date",)
         constraints = [
             UniqueConstraint(fields=["title", "author"], name="unique_author")
         ]
+        indexes = [
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="review_author_feed_idx",
+            )
+        ]
+
+    # Сигналы пишут журнал оценок: удаление и запись в журнал должны
+    # попасть в одну транзакцию (save атомарен в TextBodyMixin).
+    @transaction.atomic
+    def delete(self, *args, **kwargs):
+        return super().delete(*args, **kwargs)
 
 
-class Comment(models.Model):
+class ReviewBody(models.Model):
+    review = models.OneToOneField(
+        Review,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="body",
+    )
     text = models.TextField()
+
+    class Meta:
+        verbose_name = "Текст отзыва"
+        verbose_name_plural = "Тексты отзывов"
+
+
+# Журнал изменений оценок: запись отзыва только добавляет строку сюда,
+# не блокируя строку произведения; compact_scores сворачивает журнал
+# в Title.score_sum и Title.score_count.
+class ScoreDelta(models.Model):
+    # Без ограничения FK: при каскадном удалении произведения сигналы
+    # удаляемых отзывов пишут сюда строки уже после очистки журнала;
+    # сворачивание просто отбрасывает строки без произведения.
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="score_deltas",
+    )
+    score = models.IntegerField()
+    count = models.SmallIntegerField()
+
+    class Meta:
+        verbose_name = "Изменение оценок"
+        verbose_name_plural = "Изменения оценок"
+
+
+class Comment(TextBodyMixin, models.Model):
+    preview = models.CharField(
+        "Превью", max_length=PREVIEW_LENGTH, blank=True, editable=False
+    )
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="comments"
     )
@@ -132,9 +299,74 @@ class Comment(models.Model):
     title = models.ForeignKey(
         Title, on_delete=models.CASCADE, related_name="comments"
     )
-
-    def __str__(self):
-        return self.text
+    is_hidden = models.BooleanField("Скрыт модератором", default=False)
 
     class Meta:
         ordering = ("pub_date",)
+        indexes = [
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="comment_author_feed_idx",
+            )
+        ]
+
+
+class CommentBody(models.Model):
+    comment = models.OneToOneField(
+        Comment,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="body",
+    )
+    text = models.TextField()
+
+    class Meta:
+        verbose_name = "Текст комментария"
+        verbose_name_plural = "Тексты комментариев"
+
+
+class ModerationJob(models.Model):
+    REVIEW = "review"
+    COMMENT = "comment"
+    TARGETS = [
+        (REVIEW, REVIEW),
+        (COMMENT, COMMENT),
+    ]
+    DELETE = "delete"
+    HIDE = "hide"
+    ACTIONS = [
+        (DELETE, DELETE),
+        (HIDE, HIDE),
+    ]
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = [
+        (PENDING, PENDING),
+        (RUNNING, RUNNING),
+        (DONE, DONE),
+        (FAILED, FAILED),
+    ]
+    moderator = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="moderation_jobs"
+    )
+    target = models.CharField(max_length=20, choices=TARGETS)
+    action = models.CharField(max_length=20, choices=ACTIONS)
+    filters = models.TextField("Фильтры (JSON)")
+    status = models.CharField(
+        max_length=20, choices=STATUSES, default=PENDING
+    )
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField("Дата создания", auto_now_add=True)
+    finished = models.DateTimeField("Дата завершения", null=True)
+    heartbeat = models.DateTimeField("Последний признак жизни", null=True)
+
+    class Meta:
+        ordering = ("-created",)
+        verbose_name = "Задача модерации"
+        verbose_name_plural = "Задачи модерации"
+
+    def __str__(self):
+        return f"{self.action} {self.target} #{self.pk}"
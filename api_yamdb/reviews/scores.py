@@ -0,0 +1,79 @@
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+
+from .models import Review, ScoreDelta, Title
+
+
+def record(title_id, score, count):
+    ScoreDelta.objects.create(title_id=title_id, score=score, count=count)
+
+
+def contribution(review):
+    return (0, 0) if review.is_hidden else (review.score, 1)
+
+
+def record_removed(reviews):
+    # Для массовых update() и _raw_delete, которые не шлют сигналы.
+    # Вызывается до скрытия или удаления отзывов, в той же транзакции.
+    totals = (
+        reviews.filter(is_hidden=False)
+        .order_by()
+        .values("title_id")
+        .annotate(score_total=Sum("score"), count_total=Count("id"))
+    )
+    ScoreDelta.objects.bulk_create(
+        ScoreDelta(
+            title_id=row["title_id"],
+            score=-row["score_total"],
+            count=-row["count_total"],
+        )
+        for row in totals
+    )
+
+
+def compact(batch_size=5000):
+    # Удаляем ровно те строки журнала, что были свёрнуты: строки с меньшим
+    # id могут закоммититься позже, поэтому диапазон id не годится.
+    # SKIP LOCKED разводит параллельные сворачивания по разным строкам.
+    compacted = 0
+    while True:
+        with transaction.atomic():
+            queryset = ScoreDelta.objects.order_by("id")
+            if connection.features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            rows = list(
+                queryset.values_list("id", "title_id", "score", "count")[
+                    :batch_size
+                ]
+            )
+            if not rows:
+                return compacted
+            totals = defaultdict(lambda: [0, 0])
+            for _, title_id, score, count in rows:
+                totals[title_id][0] += score
+                totals[title_id][1] += count
+            for title_id, (score, count) in sorted(totals.items()):
+                Title.objects.filter(id=title_id).update(
+                    score_sum=F("score_sum") + score,
+                    score_count=F("score_count") + count,
+                )
+            ScoreDelta.objects.filter(id__in=[row[0] for row in rows]).delete()
+        compacted += len(rows)
+
+
+@transaction.atomic
+def rebuild():
+    ScoreDelta.objects.all().delete()
+    Title.objects.update(score_sum=0, score_count=0)
+    totals = (
+        Review.objects.filter(is_hidden=False)
+        .order_by()
+        .values("title_id")
+        .annotate(score_total=Sum("score"), count_total=Count("id"))
+    )
+    for row in totals:
+        Title.objects.filter(id=row["title_id"]).update(
+            score_sum=row["score_total"], score_count=row["count_total"]
+        )
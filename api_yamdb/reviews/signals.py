@@ -0,0 +1,48 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import scores
+from .models import Review
+
+
+@receiver(pre_save, sender=Review)
+def remember_score(sender, instance, **kwargs):
+    instance._score_before = None
+    if instance._state.adding:
+        return
+    # Review.save атомарен: блокировка строки до post_save не даёт
+    # параллельному сохранению прочитать ту же старую оценку и списать
+    # её из журнала второй раз.
+    before = (
+        Review.objects.filter(pk=instance.pk)
+        .select_for_update()
+        .values_list("title_id", "score", "is_hidden")
+        .first()
+    )
+    if before is not None:
+        title_id, score, is_hidden = before
+        instance._score_before = (
+            title_id,
+            (0, 0) if is_hidden else (score, 1),
+        )
+
+
+@receiver(post_save, sender=Review)
+def journal_saved_review(sender, instance, **kwargs):
+    score, count = scores.contribution(instance)
+    before = getattr(instance, "_score_before", None)
+    if before is not None:
+        title_id, (old_score, old_count) = before
+        if title_id != instance.title_id:
+            scores.record(title_id, -old_score, -old_count)
+        else:
+            score, count = score - old_score, count - old_count
+    if score or count:
+        scores.record(instance.title_id, score, count)
+
+
+@receiver(post_delete, sender=Review)
+def journal_deleted_review(sender, instance, **kwargs):
+    score, count = scores.contribution(instance)
+    if count:
+        scores.record(instance.title_id, -score, -count)
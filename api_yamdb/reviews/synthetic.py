@@ -0,0 +1,157 @@
+import random
+
+from django.db import connection, transaction
+
+from . import scores
+from .models import (
+    Category,
+    Comment,
+    CommentBody,
+    Genre,
+    Review,
+    ReviewBody,
+    Title,
+    User,
+)
+
+WORDS = (
+    "кино книга музыка сюжет герой финал автор жанр сцена роман песня "
+    "режиссёр актёр глава альбом мир время история любовь дорога"
+).split()
+
+
+def skewed_counts(total, buckets, cap, rnd, skew=1.2):
+    weights = [1 / (rank ** skew) for rank in range(1, buckets + 1)]
+    rnd.shuffle(weights)
+    scale = total / sum(weights)
+    return [min(cap, int(weight * scale)) for weight in weights]
+
+
+def bulk_insert(model, objs, batch_size):
+    last_id = model.objects.order_by("-id").values_list("id", flat=True)
+    last_id = last_id.first() or 0
+    fields = [
+        field for field in model._meta.concrete_fields if not field.primary_key
+    ]
+    batch_size = min(batch_size, connection.ops.bulk_batch_size(fields, objs))
+    model.objects.bulk_create(objs, batch_size=batch_size)
+    return list(model.objects.filter(id__gt=last_id).order_by("id"))
+
+
+def insert_bodies(body_model, objs, saved, batch_size):
+    # bulk_create не вызывает save(): тела текстов пишутся отдельно,
+    # превью уже заполнено сеттером text.
+    field_name = body_model._meta.pk.name
+    bodies = [
+        body_model(**{f"{field_name}_id": row.id, "text": obj.text})
+        for obj, row in zip(objs, saved)
+    ]
+    batch_size = min(
+        batch_size,
+        connection.ops.bulk_batch_size(body_model._meta.fields, bodies),
+    )
+    body_model.objects.bulk_create(bodies, batch_size=batch_size)
+
+
+def sentence(rnd, low, high):
+    return " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(low, high)))
+
+
+@transaction.atomic
+def generate(
+    users=200,
+    titles=500,
+    genres=20,
+    categories=5,
+    reviews=5000,
+    comments=5000,
+    seed=0,
+    batch_size=1000,
+):
+    rnd = random.Random(seed)
+    user_objs = bulk_insert(
+        User,
+        [
+            User(username=f"user{i}", email=f"user{i}@yamdb.ru")
+            for i in range(users)
+        ],
+        batch_size,
+    )
+    genre_objs = bulk_insert(
+        Genre,
+        [Genre(name=f"Жанр {i}", slug=f"genre-{i}") for i in range(genres)],
+        batch_size,
+    )
+    category_objs = bulk_insert(
+        Category,
+        [
+            Category(name=f"Категория {i}", slug=f"category-{i}")
+            for i in range(categories)
+        ],
+        batch_size,
+    )
+    title_objs = bulk_insert(
+        Title,
+        [
+            Title(
+                name=sentence(rnd, 1, 4).capitalize(),
+                year=rnd.randint(1950, 2022),
+                description=sentence(rnd, 10, 80),
+                category=rnd.choice(category_objs),
+            )
+            for _ in range(titles)
+        ],
+        batch_size,
+    )
+
+    Through = Title.genre.through
+    bulk_insert(
+        Through,
+        [
+            Through(title_id=title.id, genre_id=genre.id)
+            for title in title_objs
+            for genre in rnd.sample(genre_objs, rnd.randint(1, 3))
+        ],
+        batch_size,
+    )
+
+    review_objs = []
+    per_title = skewed_counts(reviews, len(title_objs), users, rnd)
+    for title, count in zip(title_objs, per_title):
+        for author in rnd.sample(user_objs, count):
+            review_objs.append(
+                Review(
+                    title_id=title.id,
+                    author_id=author.id,
+                    score=rnd.choices(range(1, 11), range(1, 11))[0],
+                    text=sentence(rnd, 5, 120),
+                )
+            )
+    saved = bulk_insert(Review, review_objs, batch_size)
+    insert_bodies(ReviewBody, review_objs, saved, batch_size)
+    review_objs = saved
+    scores.rebuild()
+
+    comment_objs = []
+    per_review = skewed_counts(comments, len(review_objs), comments, rnd)
+    for review, count in zip(review_objs, per_review):
+        for _ in range(count):
+            comment_objs.append(
+                Comment(
+                    review_id=review.id,
+                    title_id=review.title_id,
+                    author_id=rnd.choice(user_objs).id,
+                    text=sentence(rnd, 3, 40),
+                )
+            )
+    saved = bulk_insert(Comment, comment_objs, batch_size)
+    insert_bodies(CommentBody, comment_objs, saved, batch_size)
+    comment_objs = saved
+    return {
+        "users": len(user_objs),
+        "titles": len(title_objs),
+        "genres": len(genre_objs),
+        "categories": len(category_objs),
+        "reviews": len(review_objs),
+        "comments": len(comment_objs),
+    }
@@ -0,0 +1,427 @@
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANAGE_PY = os.path.join(ROOT_DIR, "api_yamdb", "manage.py")
+
+WEIGHTS = {
+    "browse": 35,
+    "search": 20,
+    "reviews": 25,
+    "auth": 5,
+    "write": 15,
+}
+SEED_DATA = {
+    "users": 300,
+    "titles": 1000,
+    "genres": 20,
+    "categories": 5,
+    "reviews": 20000,
+    "comments": 20000,
+}
+CODE_PATTERN = re.compile(r"code is (\S+)")
+RECIPIENT_PATTERN = re.compile(r"^To: (\S+)$", re.MULTILINE)
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, latency, ok):
+        with self._lock:
+            self.latencies[endpoint].append(latency)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def report(self, duration):
+        report = {}
+        for endpoint in sorted(self.latencies):
+            timings = sorted(self.latencies[endpoint])
+            report[endpoint] = {
+                "requests": len(timings),
+                "rps": round(len(timings) / duration, 2),
+                "p50_ms": percentile(timings, 0.50),
+                "p95_ms": percentile(timings, 0.95),
+                "p99_ms": percentile(timings, 0.99),
+                "error_rate": round(
+                    self.errors[endpoint] / len(timings), 4
+                ),
+            }
+        return report
+
+
+def percentile(timings, rank):
+    return round(timings[int((len(timings) - 1) * rank)] * 1000, 2)
+
+
+class Client:
+    def __init__(self, base_url, stats, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.stats = stats
+        self.timeout = timeout
+
+    def request(self, endpoint, method, path, data=None, token=None,
+                started=None):
+        # started — плановое время прихода сессии: задержка в очереди
+        # генератора входит в латентность первого запроса (open-loop).
+        headers = {"Accept": "application/json"}
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers["Content-Type"] = "application/json"
+        if token is not None:
+            headers["Authorization"] = f"Bearer {token}"
+        request = urllib.request.Request(
+            self.base_url + path, data=body, headers=headers, method=method
+        )
+        if started is None:
+            started = time.perf_counter()
+        status, payload = None, None
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as r:
+                status, payload = r.status, r.read()
+        except urllib.error.HTTPError as error:
+            status = error.code
+        except (urllib.error.URLError, OSError):
+            pass
+        ok = status is not None and status < 400
+        self.stats.record(
+            endpoint, time.perf_counter() - started, ok
+        )
+        if ok and payload:
+            return json.loads(payload)
+        return None
+
+
+class MailReader:
+    def __init__(self, mail_dir):
+        self.mail_dir = mail_dir
+        self.codes = {}
+        self.offsets = {}
+        self._lock = threading.Lock()
+
+    def code_for(self, email, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                self.scan()
+                if email in self.codes:
+                    return self.codes.pop(email)
+            time.sleep(0.05)
+        return None
+
+    def scan(self):
+        # Файловый бэкенд почты может дописывать письма в уже прочитанный
+        # файл, поэтому читаем каждый файл с места предыдущей остановки.
+        if not os.path.isdir(self.mail_dir):
+            return
+        for entry in os.scandir(self.mail_dir):
+            offset = self.offsets.get(entry.name, 0)
+            if entry.stat().st_size == offset:
+                continue
+            with open(entry.path, "rb") as f:
+                f.seek(offset)
+                content = f.read().decode("utf-8", "replace")
+                self.offsets[entry.name] = f.tell()
+            for message in content.split("-" * 79):
+                recipient = RECIPIENT_PATTERN.search(message)
+                code = CODE_PATTERN.search(message)
+                if recipient and code:
+                    self.codes[recipient.group(1)] = code.group(1)
+
+
+class Workload:
+    def __init__(self, client, mail, rnd):
+        self.client = client
+        self.mail = mail
+        self.rnd = rnd
+        self.counter = 0
+        self.writers = []
+        self._lock = threading.Lock()
+
+    def prepare(self, writers):
+        catalog = self.client.request(
+            "setup", "GET", "/api/v1/titles/?limit=200"
+        )
+        self.title_ids = [title["id"] for title in catalog["results"]]
+        self.title_count = catalog["count"]
+        genres = self.client.request(
+            "setup", "GET", "/api/v1/genres/?limit=100"
+        )
+        self.genre_slugs = [genre["slug"] for genre in genres["results"]]
+        self.review_pages = {}
+        for title_id in self.title_ids[:20]:
+            reviews = self.client.request(
+                "setup", "GET", f"/api/v1/titles/{title_id}/reviews/"
+            )
+            self.review_pages[title_id] = max(
+                1, -(-reviews["count"] // max(1, len(reviews["results"])))
+            )
+        if self.mail is not None:
+            for _ in range(writers):
+                token = self.obtain_token("setup")
+                if token is not None:
+                    self.writers.append({"token": token, "reviewed": set()})
+
+    def next_user(self):
+        with self._lock:
+            self.counter += 1
+            suffix = f"{os.getpid()}x{self.counter}"
+        return f"load{suffix}", f"load{suffix}@yamdb.ru"
+
+    def obtain_token(self, endpoint, started=None):
+        username, email = self.next_user()
+        signup = self.client.request(
+            f"{endpoint} POST signup",
+            "POST",
+            "/api/v1/auth/signup/",
+            {"username": username, "email": email},
+            started=started,
+        )
+        if signup is None or self.mail is None:
+            return None
+        code = self.mail.code_for(email)
+        token = self.client.request(
+            f"{endpoint} POST token",
+            "POST",
+            "/api/v1/auth/token/",
+            {"username": username, "confirmation_code": code},
+        )
+        return token and token.get("access")
+
+    def browse(self, started):
+        offset = self.rnd.randrange(0, max(1, self.title_count - 20))
+        self.client.request(
+            "GET titles list",
+            "GET",
+            f"/api/v1/titles/?limit=20&offset={offset}",
+            started=started,
+        )
+        # Популярные произведения получают непропорционально много трафика.
+        title_id = self.title_ids[
+            min(int(self.rnd.paretovariate(1.2)) - 1, len(self.title_ids) - 1)
+        ]
+        self.client.request(
+            "GET title detail", "GET", f"/api/v1/titles/{title_id}/"
+        )
+
+    def search(self, started):
+        params = {"genre": self.rnd.choice(self.genre_slugs), "limit": 20}
+        if self.rnd.random() < 0.5:
+            params["year__gte"] = self.rnd.randrange(1950, 2020)
+        if self.rnd.random() < 0.3:
+            params["min_rating"] = self.rnd.randrange(1, 9)
+        self.client.request(
+            "GET titles search",
+            "GET",
+            "/api/v1/titles/?" + urllib.parse.urlencode(params),
+            started=started,
+        )
+
+    def reviews(self, started):
+        title_id = self.rnd.choice(list(self.review_pages))
+        page = self.rnd.randint(1, self.review_pages[title_id])
+        self.client.request(
+            "GET reviews page",
+            "GET",
+            f"/api/v1/titles/{title_id}/reviews/?page={page}",
+            started=started,
+        )
+
+    def auth(self, started):
+        self.obtain_token("auth", started)
+
+    def write(self, started):
+        writer = self.rnd.choice(self.writers)
+        with self._lock:
+            candidates = [
+                title_id
+                for title_id in self.title_ids
+                if title_id not in writer["reviewed"]
+            ]
+            title_id = self.rnd.choice(candidates or self.title_ids)
+            writer["reviewed"].add(title_id)
+        review = self.client.request(
+            "POST review",
+            "POST",
+            f"/api/v1/titles/{title_id}/reviews/",
+            {"text": "Нагрузочный отзыв", "score": self.rnd.randint(1, 10)},
+            token=writer["token"],
+            started=started,
+        )
+        if review is None:
+            return
+        self.client.request(
+            "POST comment",
+            "POST",
+            f"/api/v1/titles/{title_id}/reviews/{review['id']}/comments/",
+            {"text": "Нагрузочный комментарий"},
+            token=writer["token"],
+        )
+
+
+def run(workload, weights, rate, duration, concurrency, rnd):
+    names = list(weights)
+    scenario_weights = [weights[name] for name in names]
+    scheduled = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        arrival = start
+        while True:
+            arrival += rnd.expovariate(rate)
+            if arrival - start >= duration:
+                break
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            scenario = rnd.choices(names, scenario_weights)[0]
+            pool.submit(getattr(workload, scenario), arrival)
+            scheduled += 1
+    return scheduled, time.perf_counter() - start
+
+
+def parse_weights(value):
+    weights = dict(WEIGHTS)
+    for pair in filter(None, value.split(",")):
+        name, weight = pair.split("=")
+        if name not in WEIGHTS:
+            raise argparse.ArgumentTypeError(f"неизвестный сценарий {name}")
+        weights[name] = float(weight)
+    return weights
+
+
+def start_local_server(port, workdir, seed):
+    env = dict(
+        os.environ,
+        DB_ENGINE="django.db.backends.sqlite3",
+        DB_NAME=os.path.join(workdir, "db.sqlite3"),
+        EMAIL_FILE_PATH=os.path.join(workdir, "sent_emails"),
+        THROTTLE_AUTH_IP="1000000/s",
+        THROTTLE_AUTH_USERNAME="1000000/s",
+    )
+    python = sys.executable
+    subprocess.run([python, MANAGE_PY, "migrate", "-v", "0"], env=env,
+                   check=True)
+    subprocess.run(
+        [python, MANAGE_PY, "generate_data", "--seed", str(seed)]
+        + [f"--{name}={count}" for name, count in SEED_DATA.items()],
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    server = subprocess.Popen(
+        [python, MANAGE_PY, "runserver", "--noreload", f"127.0.0.1:{port}"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"{url}/api/v1/titles/?limit=1", timeout=1)
+            return server, url, env["EMAIL_FILE_PATH"]
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("runserver не запустился за 30 секунд")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Нагрузочный тест API YaMDb с открытой моделью нагрузки"
+    )
+    parser.add_argument("--url", default="http://127.0.0.1")
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="Поднять runserver на SQLite с синтетическими данными",
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=20,
+                        help="Сессий в секунду (пуассоновский поток)")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--weights", type=parse_weights, default=WEIGHTS,
+                        help="Например: browse=50,write=0")
+    parser.add_argument("--writers", type=int, default=20)
+    parser.add_argument(
+        "--mail-dir",
+        help="Каталог EMAIL_FILE_PATH сервера, нужен для кодов подтверждения",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Сохранить отчёт в файл")
+    args = parser.parse_args()
+
+    server = None
+    url, mail_dir = args.url, args.mail_dir
+    workdir = tempfile.TemporaryDirectory()
+    if args.local:
+        server, url, mail_dir = start_local_server(
+            args.port, workdir.name, args.seed
+        )
+    try:
+        rnd = random.Random(args.seed)
+        weights = dict(args.weights)
+        if mail_dir is None:
+            print(
+                "Без --mail-dir коды подтверждения недоступны: сценарий "
+                "write отключён, auth проверяет только регистрацию",
+                file=sys.stderr,
+            )
+            weights["write"] = 0
+        mail = MailReader(mail_dir) if mail_dir else None
+        client = Client(url, Stats(), args.timeout)
+        workload = Workload(client, mail, rnd)
+        workload.prepare(args.writers if weights["write"] else 0)
+        if weights["write"] and not workload.writers:
+            raise RuntimeError("не удалось получить токены для записи")
+        stats = client.stats = Stats()
+        scheduled, elapsed = run(
+            workload, weights, args.rate, args.duration, args.concurrency, rnd
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        workdir.cleanup()
+
+    report = {
+        "sessions": scheduled,
+        "duration_s": round(elapsed, 2),
+        "endpoints": stats.report(elapsed),
+    }
+    print(
+        f"{'endpoint':<24} {'req':>6} {'rps':>8} {'p50':>8} {'p95':>8} "
+        f"{'p99':>8} {'errors':>7}"
+    )
+    for endpoint, row in report["endpoints"].items():
+        print(
+            f"{endpoint:<24} {row['requests']:>6} {row['rps']:>8} "
+            f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8} "
+            f"{row['error_rate']:>7.1%}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT_DIR, "benchmarks", "baseline.json")
+
+sys.path.insert(0, os.path.join(ROOT_DIR, "api_yamdb"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_yamdb.settings")
+os.environ.setdefault("DB_ENGINE", "django.db.backends.sqlite3")
+os.environ.setdefault("DB_NAME", ":memory:")
+os.environ.setdefault("THROTTLE_AUTH_IP", "1000000/s")
+os.environ.setdefault("THROTTLE_AUTH_USERNAME", "1000000/s")
+os.environ.setdefault("RESPONSE_CACHE_ENABLED", "False")
+os.environ.setdefault("TITLE_DETAIL_CACHE_BYTES", "0")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core import mail  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.models import Count  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext,
+    setup_test_environment,
+)
+from rest_framework.test import APIClient  # noqa: E402
+
+from reviews.models import Review, Title  # noqa: E402
+from reviews.synthetic import generate  # noqa: E402
+
+# Абсолютный запас, чтобы шум на быстрых эндпоинтах не считался регрессией.
+ABSOLUTE_SLACK = {"p50_ms": 1.0, "p99_ms": 2.0, "alloc_kb": 16.0}
+
+DATASET = {
+    "users": 300,
+    "titles": 1000,
+    "genres": 20,
+    "categories": 5,
+    "reviews": 10000,
+    "comments": 10000,
+    "seed": 42,
+}
+
+
+def catalog_scenarios():
+    hot_title = (
+        Title.objects.annotate(n=Count("reviews")).order_by("-n", "id").first()
+    )
+    hot_review = (
+        Review.objects.annotate(n=Count("comments"))
+        .order_by("-n", "id")
+        .first()
+    )
+    title_path = f"/api/v1/titles/{hot_title.id}/"
+    review_path = (
+        f"/api/v1/titles/{hot_review.title_id}/reviews/{hot_review.id}/"
+    )
+    return {
+        "titles_list": ("get", "/api/v1/titles/", None),
+        "titles_list_limit_100": ("get", "/api/v1/titles/?limit=100", None),
+        "titles_filter_genre": (
+            "get",
+            "/api/v1/titles/?genre=genre-1&limit=20",
+            None,
+        ),
+        "title_detail": ("get", title_path, None),
+        "reviews_list": ("get", f"{title_path}reviews/", None),
+        "comments_list": ("get", f"{review_path}comments/", None),
+        "review_detail": ("get", review_path, None),
+    }
+
+
+class AuthFlow:
+    def __init__(self):
+        self.counter = 0
+
+    def signup(self, client):
+        self.counter += 1
+        return client.post(
+            "/api/v1/auth/signup/",
+            {
+                "username": f"bench{self.counter}",
+                "email": f"bench{self.counter}@yamdb.ru",
+            },
+        )
+
+    def token(self, client):
+        response = self.signup(client)
+        code = re.search(r"code is (\S+)", mail.outbox[-1].body).group(1)
+        return client.post(
+            "/api/v1/auth/token/",
+            {"username": response.data["username"], "confirmation_code": code},
+        )
+
+
+def measure(call, iterations, warmup):
+    for _ in range(warmup):
+        call()
+    timings = []
+    queries = []
+    for _ in range(iterations):
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = call()
+            timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code < 400, (response.status_code, response)
+        queries.append(len(ctx.captured_queries))
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p99_ms": round(timings[int((len(timings) - 1) * 0.99)], 3),
+        "queries": max(queries),
+        "alloc_kb": round(peak / 1024, 1),
+    }
+
+
+def run(iterations, warmup):
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    generate(**DATASET)
+    client = APIClient()
+    results = {}
+    for name, (method, path, data) in catalog_scenarios().items():
+        results[name] = measure(
+            lambda: getattr(client, method)(path, data),
+            iterations,
+            warmup,
+        )
+    flow = AuthFlow()
+    results["auth_signup"] = measure(
+        lambda: flow.signup(client), iterations, warmup
+    )
+    results["auth_token"] = measure(
+        lambda: flow.token(client), iterations, warmup
+    )
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, current in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if current["queries"] > expected["queries"]:
+            regressions.append(
+                f"{name}: запросов к БД {current['queries']} "
+                f"> {expected['queries']}"
+            )
+        for metric, slack in ABSOLUTE_SLACK.items():
+            limit = expected[metric] * (1 + tolerance) + slack
+            if current[metric] > limit:
+                regressions.append(
+                    f"{name}: {metric} {current[metric]} > {limit:.3f}"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Бенчмарк эндпоинтов API YaMDb на синтетических данных"
+    )
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = run(args.iterations, args.warmup)
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    if args.update_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"РЕГРЕССИЯ {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,8 @@
 import sys
 from os.path import abspath, dirname, join
+from threading import local
+
+import pytest
 
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
@@ -7,3 +10,110 @@ infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
 ]
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    # Без DB_HOST тесты с базой идут на SQLite в памяти. Модуль настроек
+    # не трогаем: движок PostgreSQL в нём проверяет test_settings.
+    from django.conf import settings
+    from django.db import connections
+
+    if settings.DATABASES['default'].get('HOST'):
+        return
+    settings.DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }
+    }
+    connections._databases = None
+    connections.__dict__.pop('databases', None)
+    connections._connections = local()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_throttles(monkeypatch):
+    monkeypatch.setattr('api.throttling._backend', None)
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create(
+        username='admin', email='admin@yamdb.fake', role='admin'
+    )
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create(
+        username='user1', email='user1@yamdb.fake'
+    )
+
+
+@pytest.fixture
+def admin_client(admin):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(admin)
+    return client
+
+
+@pytest.fixture
+def user_client(user):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def title_with_reviews(django_user_model):
+    from reviews.models import Category, Comment, Review, Title
+
+    category = Category.objects.create(name='Фильмы', slug='movies')
+    title = Title.objects.create(name='Фильм', year=2001, category=category)
+    for number, score in enumerate((2, 5, 9, 10)):
+        author = django_user_model.objects.create(
+            username=f'critic{number}', email=f'critic{number}@yamdb.fake'
+        )
+        review = Review.objects.create(
+            title=title, author=author, score=score, text=f'Отзыв {number}'
+        )
+        Comment.objects.create(
+            review=review, title=title, author=author, text='Комментарий'
+        )
+    return title
+
+
+def assert_ratings_match():
+    from django.db.models import Avg, Count, Q
+    from reviews.models import Title
+
+    visible = Q(reviews__is_hidden=False)
+    titles = Title.objects.annotate(
+        expected=Avg('reviews__score', filter=visible),
+        expected_count=Count('reviews', filter=visible),
+    )
+    expected = {
+        title.id: (title.expected, title.expected_count) for title in titles
+    }
+    for title in Title.objects.with_rating():
+        average, count = expected[title.id]
+        assert title.rating_count == count, (
+            'Проверьте, что число оценок в агрегате и журнале совпадает '
+            'с числом видимых отзывов'
+        )
+        assert title.rating == pytest.approx(average), (
+            'Проверьте, что сохранённый рейтинг с учётом журнала равен '
+            'среднему по видимым отзывам'
+        )
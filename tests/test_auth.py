@@ -0,0 +1,72 @@
+import re
+
+import pytest
+from django.core import mail
+from rest_framework.test import APIClient
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+
+
+def signup(client, username='newuser', email='newuser@yamdb.fake'):
+    response = client.post(SIGNUP_URL, {'username': username, 'email': email})
+    assert response.status_code == 200
+    return re.search(r'\d{6}', mail.outbox[-1].body).group()
+
+
+@pytest.mark.django_db
+class TestConfirmationCode:
+
+    def test_code_is_single_use(self):
+        client = APIClient()
+        code = signup(client)
+        data = {'username': 'newuser', 'confirmation_code': code}
+        response = client.post(TOKEN_URL, data)
+        assert response.status_code == 201, (
+            'Проверьте, что верный код подтверждения обменивается на токен'
+        )
+        assert 'access' in response.json()
+        response = client.post(TOKEN_URL, data)
+        assert response.status_code == 400, (
+            'Проверьте, что повторный обмен того же кода возвращает 400'
+        )
+
+    def test_old_code_rejected_after_new_signup(self):
+        client = APIClient()
+        old_code = signup(client)
+        client.post(
+            TOKEN_URL, {'username': 'newuser', 'confirmation_code': old_code}
+        )
+        new_code = signup(client)
+        assert new_code != old_code, (
+            'Проверьте, что после обмена кода регистрация выдаёт новый код'
+        )
+        response = client.post(
+            TOKEN_URL, {'username': 'newuser', 'confirmation_code': new_code}
+        )
+        assert response.status_code == 201
+
+    def test_code_revoked_after_failed_attempts(self, settings, user):
+        from api.confirmation import consume_code, issue_code
+
+        settings.CONFIRMATION_CODE_MAX_ATTEMPTS = 3
+        code = issue_code(user)
+        wrong = str((int(code) + 1) % 10 ** 6).zfill(6)
+        for _ in range(settings.CONFIRMATION_CODE_MAX_ATTEMPTS):
+            assert not consume_code(user, wrong)
+        user.refresh_from_db()
+        assert not consume_code(user, code), (
+            'Проверьте, что после CONFIRMATION_CODE_MAX_ATTEMPTS неверных '
+            'попыток выданный код перестаёт действовать'
+        )
+
+    def test_failed_attempts_below_limit_keep_code(self, settings, user):
+        from api.confirmation import consume_code, issue_code
+
+        settings.CONFIRMATION_CODE_MAX_ATTEMPTS = 3
+        code = issue_code(user)
+        wrong = str((int(code) + 1) % 10 ** 6).zfill(6)
+        for _ in range(settings.CONFIRMATION_CODE_MAX_ATTEMPTS - 1):
+            assert not consume_code(user, wrong)
+        user.refresh_from_db()
+        assert consume_code(user, code)
@@ -0,0 +1,56 @@
+import pytest
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def catalog(db):
+    from reviews.models import Category, Genre, Title
+
+    category = Category.objects.create(name='Книги', slug='books')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    title = Title.objects.create(name='Роман', year=2000, category=category)
+    title.genre.set([genre])
+    return title
+
+
+@pytest.mark.django_db
+class TestGenreFilter:
+
+    def test_empty_genre_filter_is_ignored(self, catalog):
+        response = APIClient().get('/api/v1/titles/?genre=,')
+        assert response.status_code == 200
+        assert response.json()['count'] == 1, (
+            'Проверьте, что пустой фильтр genre=, не отбрасывает произведения'
+        )
+
+    def test_new_slug_found_in_stale_map(self, catalog, monkeypatch):
+        from reviews.models import Genre
+
+        client = APIClient()
+        client.get('/api/v1/titles/?genre=drama')
+        monkeypatch.setattr('api.filters.SLUG_MAP_RELOAD_AFTER', 0)
+        Genre.objects.bulk_create([Genre(name='Новый', slug='fresh')])
+        response = client.get('/api/v1/titles/?genre=fresh')
+        assert response.status_code == 200, (
+            'Проверьте, что slug, которого нет в устаревшей карте, '
+            'находится после перечитывания'
+        )
+
+    def test_unknown_slug_reload_is_rate_limited(self, catalog):
+        client = APIClient()
+        client.get('/api/v1/titles/?genre=drama')
+        client.get('/api/v1/titles/?genre=bogus')
+        with CaptureQueriesContext(connection) as queries:
+            for number in range(5):
+                response = client.get(f'/api/v1/titles/?genre=bogus{number}')
+                assert response.status_code == 400
+        reloads = [
+            query for query in queries.captured_queries
+            if 'FROM "reviews_genre"' in query['sql']
+        ]
+        assert not reloads, (
+            'Проверьте, что неизвестные slug не перечитывают карту '
+            'на каждый запрос'
+        )
@@ -0,0 +1,110 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+from .conftest import assert_ratings_match
+
+URL = '/api/v1/moderation/'
+
+
+def run_jobs():
+    call_command('run_moderation_jobs')
+
+
+@pytest.mark.django_db
+class TestModerationJobs:
+
+    def test_delete_job(self, admin_client, title_with_reviews):
+        from reviews.models import Comment, CommentBody, Review, ReviewBody
+
+        ids = list(
+            title_with_reviews.reviews.order_by('id')
+            .values_list('id', flat=True)[:2]
+        )
+        response = admin_client.post(
+            URL, {'target': 'review', 'action': 'delete', 'ids': ids},
+            format='json',
+        )
+        assert response.status_code == 201
+        assert response.json()['status'] == 'pending', (
+            'Проверьте, что POST сразу возвращает задачу, не выполняя её'
+        )
+        run_jobs()
+        job = admin_client.get(f'{URL}{response.json()["id"]}/').json()
+        assert job['status'] == 'done'
+        assert job['processed'] == job['total'] == 2
+        assert not Review.objects.filter(id__in=ids).exists()
+        assert not Comment.objects.filter(review_id__in=ids).exists()
+        assert ReviewBody.objects.count() == Review.objects.count()
+        assert CommentBody.objects.count() == Comment.objects.count()
+        assert_ratings_match()
+        call_command('compact_scores')
+        assert_ratings_match()
+
+    def test_hide_job(self, admin_client, title_with_reviews):
+        from reviews.models import Review
+
+        author = title_with_reviews.reviews.order_by('id').first().author
+        response = admin_client.post(
+            URL,
+            {'target': 'review', 'action': 'hide', 'author': author.username},
+            format='json',
+        )
+        assert response.status_code == 201
+        run_jobs()
+        assert Review.objects.get(author=author).is_hidden
+        assert_ratings_match()
+        response = admin_client.get(
+            f'/api/v1/titles/{title_with_reviews.id}/reviews/'
+        )
+        assert response.json()['count'] == 3
+
+    def test_stale_job_is_recovered(self, admin, title_with_reviews):
+        from reviews.models import ModerationJob
+
+        ids = list(title_with_reviews.reviews.values_list('id', flat=True))
+        stale = ModerationJob.objects.create(
+            moderator=admin, target='review', action='hide',
+            filters=json.dumps({'ids': ids}), status=ModerationJob.RUNNING,
+            heartbeat=timezone.now() - timedelta(minutes=10),
+        )
+        alive = ModerationJob.objects.create(
+            moderator=admin, target='review', action='hide',
+            filters=json.dumps({'ids': ids}), status=ModerationJob.RUNNING,
+            heartbeat=timezone.now(),
+        )
+        run_jobs()
+        stale.refresh_from_db()
+        alive.refresh_from_db()
+        assert stale.status == ModerationJob.DONE, (
+            'Проверьте, что задача с устаревшим heartbeat подхватывается'
+        )
+        assert alive.status == ModerationJob.RUNNING, (
+            'Проверьте, что живая задача не запускается повторно'
+        )
+        assert_ratings_match()
+
+    def test_batch_processed_twice_is_journaled_once(
+        self, admin, title_with_reviews
+    ):
+        from api.moderation import apply_batch, lock_batch
+        from reviews.models import ModerationJob
+
+        ids = list(title_with_reviews.reviews.values_list('id', flat=True))
+        job = ModerationJob.objects.create(
+            moderator=admin, target='review', action='hide',
+            filters=json.dumps({'ids': ids}),
+        )
+        for expected in (sorted(ids), []):
+            with transaction.atomic():
+                batch = lock_batch(job, ids)
+                assert batch == expected, (
+                    'Проверьте, что повторная пачка не захватывает уже '
+                    'обработанные строки'
+                )
+                apply_batch(job, batch)
+        assert_ratings_match()
@@ -0,0 +1,143 @@
+import time
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from api import caching
+
+TITLES_URL = '/api/v1/titles/'
+
+
+class HeldLock:
+    # Блокировка ключа занята другим запросом, который отпускает её, так и
+    # не записав ответ в кеш.
+    def __init__(self, cache):
+        self.cache = cache
+        self.held = True
+
+    def __getattr__(self, name):
+        return getattr(self.cache, name)
+
+    def add(self, key, *args, **kwargs):
+        if key.endswith('_lock') and self.held:
+            self.held = False
+            return False
+        return self.cache.add(key, *args, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def fresh_title_detail_cache(settings, monkeypatch):
+    settings.RESPONSE_CACHE_ENABLED = True
+    settings.TITLE_DETAIL_STALENESS = 0
+    monkeypatch.setattr('api.caching._title_detail_cache', None)
+
+
+@pytest.fixture
+def anonymous():
+    return APIClient()
+
+
+def get(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response
+
+
+@pytest.mark.django_db
+class TestResponseCacheLock:
+
+    def test_waiter_takes_released_lock(self, anonymous, monkeypatch):
+        lock = HeldLock(caching.cache)
+        monkeypatch.setattr('api.caching.cache', lock)
+        started = time.monotonic()
+        response = anonymous.get(f'{TITLES_URL}999/')
+        elapsed = time.monotonic() - started
+        assert response.status_code == 404
+        assert not lock.held
+        assert elapsed < 1, (
+            'Проверьте, что ожидающий запрос забирает освободившуюся '
+            'блокировку, а не ждёт RESPONSE_CACHE_LOCK_TIMEOUT'
+        )
+
+    def test_waiter_caches_response(
+        self, anonymous, monkeypatch, title_with_reviews
+    ):
+        monkeypatch.setattr('api.caching.cache', HeldLock(caching.cache))
+        started = time.monotonic()
+        response = get(anonymous, TITLES_URL)
+        assert time.monotonic() - started < 1
+        assert 'X-Cache' not in response
+        assert get(anonymous, TITLES_URL)['X-Cache'] == 'HIT'
+
+
+@pytest.mark.django_db
+class TestResponseCacheInvalidation:
+
+    def test_title_edit(self, anonymous, admin_client, title_with_reviews):
+        url = f'{TITLES_URL}{title_with_reviews.id}/'
+        get(anonymous, url)
+        get(anonymous, TITLES_URL)
+        assert get(anonymous, url)['X-Cache'] == 'HIT'
+        response = admin_client.patch(url, {'name': 'Новое название'})
+        assert response.status_code == 200
+        assert get(anonymous, url).json()['name'] == 'Новое название'
+        titles = get(anonymous, TITLES_URL).json()['results']
+        assert titles[0]['name'] == 'Новое название', (
+            'Проверьте, что изменение произведения сбрасывает кеш списка'
+        )
+
+    def test_review_write(self, anonymous, user_client, title_with_reviews):
+        url = f'{TITLES_URL}{title_with_reviews.id}/'
+        reviews_url = f'{url}reviews/'
+        rating = get(anonymous, url).json()['rating']
+        assert get(anonymous, reviews_url).json()['count'] == 4
+        response = user_client.post(
+            reviews_url, {'text': 'Новый отзыв', 'score': 1}
+        )
+        assert response.status_code == 201
+        assert get(anonymous, reviews_url).json()['count'] == 5, (
+            'Проверьте, что новый отзыв сбрасывает кеш списка отзывов'
+        )
+        assert get(anonymous, url).json()['rating'] != rating, (
+            'Проверьте, что новый отзыв сбрасывает кеш произведения'
+        )
+
+    def test_genre_rename(self, anonymous, title_with_reviews):
+        from reviews.models import Genre
+
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        title_with_reviews.genre.add(genre)
+        url = f'{TITLES_URL}{title_with_reviews.id}/'
+        get(anonymous, url)
+        get(anonymous, TITLES_URL)
+        genre.name = 'Трагедия'
+        genre.save()
+        assert get(anonymous, url).json()['genre'][0]['name'] == 'Трагедия'
+        titles = get(anonymous, TITLES_URL).json()['results']
+        assert titles[0]['genre'][0]['name'] == 'Трагедия', (
+            'Проверьте, что переименование жанра сбрасывает кеш списка'
+        )
+
+    def test_moderation(self, anonymous, admin_client, title_with_reviews):
+        url = f'{TITLES_URL}{title_with_reviews.id}/'
+        reviews_url = f'{url}reviews/'
+        rating = get(anonymous, url).json()['rating']
+        get(anonymous, reviews_url)
+        ids = list(
+            title_with_reviews.reviews.order_by('score')
+            .values_list('id', flat=True)
+        )
+        response = admin_client.post(
+            '/api/v1/moderation/',
+            {'target': 'review', 'action': 'delete', 'ids': ids[:2]},
+            format='json',
+        )
+        assert response.status_code == 201
+        call_command('run_moderation_jobs')
+        assert get(anonymous, reviews_url).json()['count'] == 2, (
+            'Проверьте, что задача модерации сбрасывает кеш отзывов'
+        )
+        assert get(anonymous, url).json()['rating'] > rating, (
+            'Проверьте, что задача модерации сбрасывает кеш произведения'
+        )
@@ -0,0 +1,73 @@
+import pytest
+from django.core.management import call_command
+
+from .conftest import assert_ratings_match
+
+
+@pytest.fixture
+def other_title(title_with_reviews, user):
+    from reviews.models import Review, Title
+
+    title = Title.objects.create(
+        name='Другой фильм', year=2002, category=title_with_reviews.category
+    )
+    Review.objects.create(title=title, author=user, score=7, text='Отзыв')
+    return title
+
+
+def check():
+    assert_ratings_match()
+    call_command('compact_scores')
+    assert_ratings_match()
+
+
+@pytest.mark.django_db
+class TestScoreJournal:
+
+    def test_create(self, title_with_reviews, other_title):
+        check()
+
+    def test_update(self, title_with_reviews, other_title):
+        review = title_with_reviews.reviews.order_by('id').first()
+        review.score = 8
+        review.save()
+        assert_ratings_match()
+        review.title = other_title
+        review.save()
+        check()
+
+    def test_hide(self, title_with_reviews, other_title):
+        review = title_with_reviews.reviews.order_by('id').first()
+        review.is_hidden = True
+        review.save()
+        assert_ratings_match()
+        review.score = 3
+        review.save()
+        assert_ratings_match()
+        review.is_hidden = False
+        review.save()
+        check()
+
+    def test_delete(self, title_with_reviews, other_title):
+        title_with_reviews.reviews.order_by('id').first().delete()
+        check()
+
+    def test_user_cascade(self, title_with_reviews, other_title, user):
+        title_with_reviews.reviews.order_by('id').first().author.delete()
+        user.delete()
+        check()
+
+    def test_title_cascade(self, title_with_reviews, other_title):
+        from reviews.models import Title
+
+        title_with_reviews.delete()
+        assert Title.objects.with_rating().get(
+            id=other_title.id
+        ).rating == 7
+        check()
+
+    def test_repeated_compact(self, title_with_reviews, other_title):
+        call_command('compact_scores')
+        title_with_reviews.reviews.order_by('id').last().delete()
+        check()
+        check()
@@ -0,0 +1,63 @@
+import pytest
+from rest_framework.test import APIClient
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+BACKENDS = (
+    'api.throttling.LocalMemoryBucketBackend',
+    'api.throttling.CacheBucketBackend',
+)
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, settings):
+    settings.THROTTLE_BACKEND = {'BACKEND': request.param}
+    return request.param
+
+
+def signup(client, username, forwarded_for):
+    return client.post(
+        SIGNUP_URL,
+        {'username': username, 'email': f'{username}@yamdb.fake'},
+        HTTP_X_FORWARDED_FOR=forwarded_for,
+    )
+
+
+@pytest.mark.django_db
+class TestAuthThrottling:
+
+    def test_username_limit_returns_retry_after(self, backend):
+        client = APIClient()
+        for number in range(5):
+            response = signup(client, 'bucket', f'10.0.0.{number}')
+            assert response.status_code == 200
+        response = signup(client, 'bucket', '10.0.0.100')
+        assert response.status_code == 429, (
+            'Проверьте, что после исчерпания лимита по username '
+            'возвращается 429'
+        )
+        assert int(response['Retry-After']) > 0, (
+            'Проверьте, что ответ 429 содержит заголовок Retry-After'
+        )
+
+    def test_ip_limit_ignores_spoofed_forwarded_for(self, backend):
+        client = APIClient()
+        for number in range(20):
+            response = signup(
+                client, f'user{number}', f'192.0.2.{number}, 10.0.0.1'
+            )
+            assert response.status_code == 200
+        response = signup(client, 'user20', '192.0.2.200, 10.0.0.1')
+        assert response.status_code == 429, (
+            'Проверьте, что подставленный клиентом X-Forwarded-For не '
+            'даёт новую корзину лимита по IP'
+        )
+
+    def test_ip_limit_is_per_client(self, backend):
+        client = APIClient()
+        for number in range(20):
+            assert signup(client, f'a{number}', '10.0.0.1').status_code == 200
+        assert signup(client, 'a20', '10.0.0.1').status_code == 429
+        assert signup(client, 'b0', '10.0.0.2').status_code == 200, (
+            'Проверьте, что лимит по IP считается для каждого клиента '
+            'отдельно, а не для адреса nginx'
+        )
@@ -0,0 +1,46 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestUsersCaseInsensitive:
+
+    def test_admin_create_username_case_variant(self, admin_client, user):
+        response = admin_client.post(
+            '/api/v1/users/',
+            {'username': 'USER1', 'email': 'other@yamdb.fake'},
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что POST /api/v1/users/ с username, отличающимся '
+            'только регистром, возвращает 400'
+        )
+        assert 'username' in response.json()
+
+    def test_admin_create_email_case_variant(self, admin_client, user):
+        response = admin_client.post(
+            '/api/v1/users/',
+            {'username': 'other', 'email': 'USER1@yamdb.fake'},
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что POST /api/v1/users/ с email, отличающимся '
+            'только регистром, возвращает 400'
+        )
+        assert 'email' in response.json()
+
+    def test_me_patch_email_case_variant(self, user_client, admin):
+        response = user_client.patch(
+            '/api/v1/users/me/', {'email': 'ADMIN@yamdb.fake'}
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что PATCH /api/v1/users/me/ с чужим email в другом '
+            'регистре возвращает 400'
+        )
+
+    def test_me_patch_own_email_case(self, user_client, user):
+        response = user_client.patch(
+            '/api/v1/users/me/', {'email': 'USER1@yamdb.fake'}
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что пользователь может сменить регистр своего email'
+        )
+        user.refresh_from_db()
+        assert user.email == 'USER1@yamdb.fake'